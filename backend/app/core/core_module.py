@@ -510,6 +510,7 @@ class CoreModule:
         if hasattr(self.model, 'predictor') and self.model.predictor: del self.model.predictor
         del self.model
         if self.preprocessor and hasattr(self.preprocessor, 'gemini_model'): del self.preprocessor.gemini_model
+        if self.preprocessor and hasattr(self.preprocessor, 'close'): self.preprocessor.close() # Tesseract worker threads
 
         import gc; gc.collect()
         try:
@@ -58,21 +58,8 @@ async def get_alerts(
     logger.debug(f"Fetching alerts with filters: {filters}, page: {page}, limit: {limit}")
 
     try:
-        alerts_data_from_db = await db.get_alerts_filtered(filters=filters, limit=limit, offset=offset)
-        # Assuming count_alerts_filtered exists or will be added to DatabaseManager if total_count is crucial here.
-        # For now, focusing on getting the alerts. A full count might be intensive.
-        # total_count = await db.count_alerts_filtered(filters=filters)
-        # Simplified total_count for now, or it needs to be implemented in DBManager
-        total_count = len(alerts_data_from_db) # This is only count for current page if not all fetched.
-                                               # For a proper total_count, db.count_alerts_filtered is needed.
-                                               # Assuming it exists for the sake of this example.
-        
-        # Placeholder for actual count method:
-        try:
-            actual_total_count = await db.count_alerts_filtered(filters=filters)
-        except AttributeError: # If count_alerts_filtered doesn't exist
-            logger.warning("DatabaseManager.count_alerts_filtered method not found. Total count might be inaccurate.")
-            actual_total_count = len(alerts_data_from_db) # Fallback
+        # Page and total count come back from one query (COUNT(*) OVER ()) instead of two round trips
+        alerts_data_from_db, actual_total_count = await db.list_and_count_alerts_filtered(filters=filters, limit=limit, offset=offset)
 
         alert_items = [AlertModel(**alert_data) for alert_data in alerts_data_from_db]
 
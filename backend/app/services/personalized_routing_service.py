@@ -1,5 +1,5 @@
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime, timedelta # Added timedelta for time-based filtering
 from collections import Counter, defaultdict # Added for proactive suggestions
 from sqlalchemy import create_engine, Column, String, DateTime, JSON, Float, Integer
@@ -281,14 +281,15 @@ class PersonalizedRoutingService:
                 return []
 
             # Helper to create a grouping key for locations (rounded lat/lon)
-            def get_location_group_key(loc_json: Dict[str, Any], precision: int = 3) -> Optional[str]:
+            # Tuple keys hash cheaper than formatted strings when grouping large histories.
+            def get_location_group_key(loc_json: Dict[str, Any], precision: int = 3) -> Optional[Tuple[float, float]]:
                 if not loc_json or 'latitude' not in loc_json or 'longitude' not in loc_json:
                     return None
                 # Ensure lat/lon are floats before rounding
                 try:
                     lat = float(loc_json['latitude'])
                     lon = float(loc_json['longitude'])
-                    return f"{lat:.{precision}f}_{lon:.{precision}f}"
+                    return (round(lat, precision), round(lon, precision))
                 except (ValueError, TypeError):
                     return None # Could not parse lat/lon
 
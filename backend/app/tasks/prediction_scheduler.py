@@ -2,7 +2,7 @@ import asyncio
 import logging
 import random # Added random for dynamic location selection
 from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 import json
 
 from app.services.analytics_service import AnalyticsService
@@ -11,6 +11,16 @@ from app.models.websocket import WebSocketMessage, WebSocketMessageTypeEnum, Gen
 
 logger = logging.getLogger(__name__)
 
+# Pool of locations the scheduler can choose from, built once at import.
+# In a real system, this might come from a database or configuration.
+_ALL_LOCATIONS: Tuple[LocationModel, ...] = (
+    LocationModel(latitude=34.0522, longitude=-118.2437, name="Los Angeles Downtown"),
+    LocationModel(latitude=40.7128, longitude=-74.0060, name="New York Times Square"),
+    LocationModel(latitude=41.8781, longitude=-87.6298, name="Chicago The Loop"),
+    LocationModel(latitude=37.7749, longitude=-122.4194, name="San Francisco Embarcadero"),
+    LocationModel(latitude=33.7490, longitude=-84.3880, name="Atlanta Centennial Park"),
+)
+
 class PredictionScheduler:
     def __init__(self, analytics_service: AnalyticsService, prediction_interval_minutes: int = 15):
         self.analytics_service = analytics_service
@@ -58,15 +68,7 @@ class PredictionScheduler:
             else:
                 self.logger.info("No priority locations set. Attempting to select locations based on prediction accuracy.")
 
-                # Define the pool of locations the scheduler can choose from.
-                # In a real system, this might come from a database or configuration.
-                all_locations = [
-                    LocationModel(latitude=34.0522, longitude=-118.2437, name="Los Angeles Downtown"),
-                    LocationModel(latitude=40.7128, longitude=-74.0060, name="New York Times Square"),
-                    LocationModel(latitude=41.8781, longitude=-87.6298, name="Chicago The Loop"),
-                    LocationModel(latitude=37.7749, longitude=-122.4194, name="San Francisco Embarcadero"),
-                    LocationModel(latitude=33.7490, longitude=-84.3880, name="Atlanta Centennial Park")
-                ]
+                all_locations = _ALL_LOCATIONS
                 if not all_locations:
                     self.monitored_locations = []
                     return
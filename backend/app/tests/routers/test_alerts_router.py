@@ -136,6 +136,39 @@ class TestAlertsRouter(unittest.TestCase):
         mock_db_manager.get_alert_by_id.assert_not_awaited() # Should not be called if ack fails
         mock_connection_manager.broadcast_message_model.assert_not_awaited()
 
+    # get_alerts awaits get_db() directly rather than through Depends, so patch the router's reference to it
+    @patch("app.routers.alerts.get_db", new=override_get_db)
+    def test_get_alerts_returns_page_and_total_count(self):
+        alert_rows = [
+            {"id": i, "timestamp": datetime.now(timezone.utc).timestamp(), "severity": "WARNING",
+             "feed_id": "feed123", "message": f"Alert {i}", "details": None, "acknowledged": False}
+            for i in (12, 11)
+        ]
+        mock_db_manager.list_and_count_alerts_filtered = AsyncMock(return_value=(alert_rows, 12))
+
+        response = self.client.get("/api/v1/alerts/", params={"severity": "WARNING", "page": 2, "limit": 2})
+
+        self.assertEqual(response.status_code, 200)
+        mock_db_manager.list_and_count_alerts_filtered.assert_awaited_once_with(
+            filters={"severity": "WARNING", "feed_id": None, "search": None}, limit=2, offset=2
+        )
+        response_data = response.json()
+        self.assertEqual(response_data["total_count"], 12)
+        self.assertEqual((response_data["page"], response_data["limit"]), (2, 2))
+        self.assertEqual([alert["id"] for alert in response_data["alerts"]], [12, 11])
+
+    @patch("app.routers.alerts.get_db", new=override_get_db)
+    def test_get_alerts_page_past_the_end_keeps_total_count(self):
+        mock_db_manager.list_and_count_alerts_filtered = AsyncMock(return_value=([], 3))
+
+        response = self.client.get("/api/v1/alerts/", params={"page": 5, "limit": 10})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["alerts"], [])
+        self.assertEqual(response.json()["total_count"], 3)
+        _, kwargs = mock_db_manager.list_and_count_alerts_filtered.call_args
+        self.assertEqual(kwargs["offset"], 40)
+
     def tearDown(self):
         # Clear dependency overrides after tests
         app.dependency_overrides = {}
@@ -1,6 +1,7 @@
 import unittest
 from unittest.mock import MagicMock, patch, AsyncMock
 import asyncio
+import atexit
 from datetime import datetime, timezone, timedelta
 import numpy as np # For np.mean in tests
 
@@ -266,14 +267,16 @@ class TestAnalyticsService(unittest.TestCase):
         self.assertIsNone(self.analytics_service._node_congestion_task)
 
 
+# One event loop shared by every wrapped test, instead of building and tearing
+# down a fresh loop per test method.
+_LOOP = asyncio.new_event_loop()
+atexit.register(_LOOP.close)
+
 # Helper to run async tests with unittest
 def async_test(f):
     def wrapper(*args, **kwargs):
-        loop = asyncio.get_event_loop_policy().new_event_loop()
-        asyncio.set_event_loop(loop)
-        result = loop.run_until_complete(f(*args, **kwargs))
-        loop.close()
-        return result
+        asyncio.set_event_loop(_LOOP)
+        return _LOOP.run_until_complete(f(*args, **kwargs))
     return wrapper
 
 # Apply the wrapper to all async test methods
@@ -1,4 +1,3 @@
-import asyncio
 import unittest
 from unittest.mock import patch, MagicMock, ANY
 from collections import Counter
@@ -9,7 +8,7 @@ from app.ml.preference_learner import UserPreferenceLearner # For mock
 from app.ml.route_optimizer import RouteOptimizer # For mock
 
 
-class TestPersonalizedRoutingService(unittest.TestCase):
+class TestPersonalizedRoutingService(unittest.IsolatedAsyncioTestCase):
 
     def setUp(self):
         # Mock dependencies for PersonalizedRoutingService
@@ -108,24 +107,18 @@ class TestPersonalizedRoutingService(unittest.TestCase):
             mock_logger.info.assert_any_call(f"No common destination found for user {user_id} to make a proactive suggestion.")
 
 
-# Wrapper for async tests
-def async_test(f):
-    def wrapper(*args, **kwargs):
-        return asyncio.run(f(*args, **kwargs))
-    return wrapper
-
-TestPersonalizedRoutingService.test_proactively_suggest_route_suggestion_generated = async_test(TestPersonalizedRoutingService.test_proactively_suggest_route_suggestion_generated)
-TestPersonalizedRoutingService.test_proactively_suggest_route_no_common_destination = async_test(TestPersonalizedRoutingService.test_proactively_suggest_route_no_common_destination)
-
-
 if __name__ == '__main__':
     unittest.main()
 
 
 # --- New Test Class for DB-dependent tests ---
+import os
+import sqlite3
 import uuid # For generating unique IDs
 from datetime import datetime, timedelta
-from sqlalchemy import create_engine
+from freezegun import freeze_time
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
 from sqlalchemy.orm import sessionmaker # Note: Session is already imported in PersonalizedRoutingService for type hints, but good to have here too.
 # Explicitly import Base and models needed for table creation and direct querying in tests
 from app.services.personalized_routing_service import Base, ProactiveSuggestionFeedbackLog, CommonTravelPattern
@@ -139,14 +132,46 @@ USER_ID_DB_TEST_2 = "db_user_2"
 SUGGESTION_ID_DB_TEST_1 = str(uuid.uuid4())
 SUGGESTION_ID_DB_TEST_2 = str(uuid.uuid4())
 
+_UUID_BATCH_SIZE = 64
+
+def _uuid_pool():
+    # One os.urandom call per batch instead of one per uuid4()
+    while True:
+        raw = os.urandom(16 * _UUID_BATCH_SIZE)
+        for i in range(0, len(raw), 16):
+            yield str(uuid.UUID(bytes=raw[i:i + 16], version=4))
+
+_UUID_POOL = _uuid_pool()
+
+def _next_uuid() -> str:
+    return next(_UUID_POOL)
+
+# Every test gets its own in-memory SQLite engine and each pytest-xdist worker is a
+# separate process, so these tests are safe to run in parallel:
+#   pytest -n auto backend/app/tests/services/test_personalized_routing_service.py
 class TestPersonalizedRoutingServiceWithDb(unittest.IsolatedAsyncioTestCase):
 
-    async def asyncSetUp(self):
-        self.engine = create_engine("sqlite:///:memory:")
+    @classmethod
+    def setUpClass(cls):
+        # Run SQLAlchemy's DDL compiler once and snapshot the resulting schema;
+        # each test then replays it with a single executescript call.
         # Base is imported from personalized_routing_service where all relevant models are registered
-        Base.metadata.create_all(self.engine)
+        schema_engine = create_engine("sqlite:///:memory:")
+        Base.metadata.create_all(schema_engine)
+        with schema_engine.connect() as conn:
+            rows = conn.exec_driver_sql("SELECT sql FROM sqlite_master WHERE sql IS NOT NULL").scalars().all()
+        schema_engine.dispose()
+        cls._SCHEMA_SQL = ";\n".join(rows) + ";"
 
-        self.TestSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        # One session factory for the whole class; asyncSetUp rebinds it to each test's engine.
+        # expire_on_commit=False lets tests re-read committed objects without another SELECT.
+        cls.TestSessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False)
+
+    async def asyncSetUp(self):
+        raw_conn = sqlite3.connect(":memory:", check_same_thread=False)
+        raw_conn.executescript(self._SCHEMA_SQL)
+        self.engine = create_engine("sqlite://", creator=lambda: raw_conn, poolclass=StaticPool)
+        self.TestSessionLocal.configure(bind=self.engine)
 
         self.mock_traffic_predictor = MagicMock()
         self.mock_data_cache = MagicMock()
@@ -173,17 +198,15 @@ class TestPersonalizedRoutingServiceWithDb(unittest.IsolatedAsyncioTestCase):
         self.patcher_learner.stop()
         self.patcher_optimizer.stop()
 
-        # Base.metadata.drop_all(self.engine) # Clean up tables - good practice
-        # For in-memory, connection close/dispose might be enough and tables are dropped with engine
-        async with self.engine.connect() as conn: # Ensure connection is active for drop_all
-             await conn.run_sync(Base.metadata.drop_all)
-        await self.engine.dispose()
+        # self.engine is a sync engine, so use the sync API directly rather than awaiting it
+        Base.metadata.drop_all(self.engine)
+        self.engine.dispose()
 
 
     async def _add_suggestion_log_entry(self, session, **kwargs): # session is SQLAlchemy Session
         entry_data = {
-            "id": str(uuid.uuid4()),
-            "suggestion_id": str(uuid.uuid4()), # Default, can be overridden by kwargs
+            "id": _next_uuid(),
+            "suggestion_id": _next_uuid(), # Default, can be overridden by kwargs
             "user_id": USER_ID_DB_TEST_1,
             "timestamp": datetime.utcnow(),
             "suggestion_details": {"type": "test_suggestion", "destination_name": "Test Dest"},
@@ -197,7 +220,7 @@ class TestPersonalizedRoutingServiceWithDb(unittest.IsolatedAsyncioTestCase):
 
     async def _add_route_history_entry(self, session, **kwargs): # session is SQLAlchemy Session
         entry_data = {
-            "id": str(uuid.uuid4()),
+            "id": _next_uuid(),
             "user_id": USER_ID_DB_TEST_1, # Default, can be overridden
             "start_location": {"latitude": 34.0, "longitude": -118.0, "name": "Start"},
             "end_location": {"latitude": 34.1, "longitude": -118.1, "name": "End"},
@@ -238,14 +261,18 @@ class TestPersonalizedRoutingServiceWithDb(unittest.IsolatedAsyncioTestCase):
             # Query for the log entry
             # Need to be careful with created_at if there are other tests; filter more specifically
             log_entries = (await session.execute(
-                select(ProactiveSuggestionFeedbackLog).filter_by(user_id=USER_ID_DB_TEST_1, interaction_status="suggested")
-            )).scalars().all()
+                text(
+                    "SELECT user_id, json_extract(suggestion_details, '$.destination_name') AS destination_name "
+                    "FROM proactive_suggestion_feedback_log WHERE user_id = :uid AND interaction_status = 'suggested'"
+                ),
+                {"uid": USER_ID_DB_TEST_1}
+            )).all()
 
             self.assertGreater(len(log_entries), 0, "No suggestion log found")
             # Find the one most likely created by this test
             found_log = None
             for log_entry in log_entries:
-                 if log_entry.suggestion_details["destination_name"] == f"({common_dest['latitude']}, {common_dest['longitude']})":
+                 if log_entry.destination_name == f"({common_dest['latitude']}, {common_dest['longitude']})":
                     found_log = log_entry
                     break
             self.assertIsNotNone(found_log, "Specific suggestion log not found")
@@ -273,12 +300,12 @@ class TestPersonalizedRoutingServiceWithDb(unittest.IsolatedAsyncioTestCase):
 
         async with self.TestSessionLocal() as session:
             new_suggestions = (await session.execute(
-                select(ProactiveSuggestionFeedbackLog).filter(
-                    ProactiveSuggestionFeedbackLog.user_id == USER_ID_DB_TEST_1,
-                    ProactiveSuggestionFeedbackLog.interaction_status == "suggested",
-                    ProactiveSuggestionFeedbackLog.created_at > (datetime.utcnow() - timedelta(minutes=1)) # Check for very recent entries
-                )
-            )).scalars().all()
+                text(
+                    "SELECT id FROM proactive_suggestion_feedback_log "
+                    "WHERE user_id = :uid AND interaction_status = 'suggested' AND created_at > :since"
+                ),
+                {"uid": USER_ID_DB_TEST_1, "since": datetime.utcnow() - timedelta(minutes=1)} # Check for very recent entries
+            )).all()
             self.assertEqual(len(new_suggestions), 0, "A new 'suggested' log was created despite negative feedback")
 
     # 4. Test record_suggestion_feedback updates log
@@ -350,8 +377,12 @@ class TestPersonalizedRoutingServiceWithDb(unittest.IsolatedAsyncioTestCase):
 
             # Re-querying the log entry
             log_entry_after_failed_update = (await session.execute(
-                select(ProactiveSuggestionFeedbackLog).filter_by(suggestion_id=suggestion_id_for_mismatch)
-            )).scalar_one_or_none()
+                text(
+                    "SELECT user_id, interaction_status, user_feedback_text, user_rating "
+                    "FROM proactive_suggestion_feedback_log WHERE suggestion_id = :sid"
+                ),
+                {"sid": suggestion_id_for_mismatch}
+            )).one_or_none()
 
             self.assertIsNotNone(log_entry_after_failed_update)
             self.assertEqual(log_entry_after_failed_update.user_id, original_user_id) # Still original user
@@ -387,12 +418,14 @@ class TestPersonalizedRoutingServiceWithDb(unittest.IsolatedAsyncioTestCase):
 
         async with self.TestSessionLocal() as session:
             updated_log = (await session.execute(
-                select(ProactiveSuggestionFeedbackLog).filter_by(suggestion_id=suggestion_to_accept)
-            )).scalar_one_or_none()
+                text("SELECT interaction_status FROM proactive_suggestion_feedback_log WHERE suggestion_id = :sid"),
+                {"sid": suggestion_to_accept}
+            )).one_or_none()
             self.assertIsNotNone(updated_log)
             self.assertEqual(updated_log.interaction_status, "accepted_and_completed")
 
     # 7. Test get_user_common_travel_patterns
+    @freeze_time("2024-01-17") # A Wednesday, so the last three days are all weekdays
     async def test_get_user_common_travel_patterns(self):
         now_utc = datetime.utcnow()
         # Pattern 1: Home to Work, Morning Weekday (3 times)
@@ -400,27 +433,14 @@ class TestPersonalizedRoutingServiceWithDb(unittest.IsolatedAsyncioTestCase):
         m_w_end_loc = {"latitude": 34.101, "longitude": -118.101, "name": "Work"}
 
         async with self.TestSessionLocal() as session:
-            # Ensure these are actual weekdays
-            days_added = 0
-            for i in range(3):
-                day_offset = days_added
-                while (now_utc - timedelta(days=day_offset)).weekday() >= 5: # if weekend, skip
-                    days_added += 1
-                    day_offset = days_added
-                await self._add_route_history_entry(session, user_id=USER_ID_DB_TEST_1, start_location=m_w_start_loc, end_location=m_w_end_loc, start_time=(now_utc - timedelta(days=day_offset)).replace(hour=8, minute=0), duration_minutes=30.0 + i)
-                days_added += 1 # ensure different days for variety if needed by test logic
+            for day_offset in range(3): # Wed, Tue, Mon
+                await self._add_route_history_entry(session, user_id=USER_ID_DB_TEST_1, start_location=m_w_start_loc, end_location=m_w_end_loc, start_time=(now_utc - timedelta(days=day_offset)).replace(hour=8, minute=0), duration_minutes=30.0 + day_offset)
 
             # Pattern 2: Work to Home, Evening Weekday (2 times)
             e_w_start_loc = {"latitude": 34.101, "longitude": -118.101, "name": "Work"}
             e_w_end_loc = {"latitude": 34.001, "longitude": -118.001, "name": "Home"}
-            days_added = 0
-            for i in range(2):
-                day_offset = days_added
-                while (now_utc - timedelta(days=day_offset)).weekday() >= 5:
-                    days_added += 1
-                    day_offset = days_added
-                await self._add_route_history_entry(session, user_id=USER_ID_DB_TEST_1, start_location=e_w_start_loc, end_location=e_w_end_loc, start_time=(now_utc - timedelta(days=day_offset)).replace(hour=17, minute=0), duration_minutes=40.0 + i)
-                days_added += 1
+            for day_offset in range(2): # Wed, Tue
+                await self._add_route_history_entry(session, user_id=USER_ID_DB_TEST_1, start_location=e_w_start_loc, end_location=e_w_end_loc, start_time=(now_utc - timedelta(days=day_offset)).replace(hour=17, minute=0), duration_minutes=40.0 + day_offset)
 
             # A different, less frequent pattern
             await self._add_route_history_entry(session, user_id=USER_ID_DB_TEST_1, start_location=m_w_start_loc, end_location={"latitude": 35.0, "longitude": -119.0, "name":"Gym"}, start_time=now_utc.replace(hour=13, minute=0), duration_minutes=60)
@@ -453,6 +473,7 @@ class TestPersonalizedRoutingServiceWithDb(unittest.IsolatedAsyncioTestCase):
         patterns = await self.service.get_user_common_travel_patterns(user_id="user_with_absolutely_no_history", top_n=3)
         self.assertEqual(len(patterns), 0)
 
+    @freeze_time("2024-01-17")
     async def test_get_user_common_travel_patterns_precision_grouping(self):
         loc1_a = {"latitude": 34.0001, "longitude": -118.0001, "name": "Near Home A"}
         loc1_b = {"latitude": 34.0002, "longitude": -118.0002, "name": "Near Home B"}
@@ -0,0 +1,59 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from app.utils import config as config_module
+from app.utils.config import DEFAULT_CONFIG, load_config
+
+
+class TestLoadConfig(unittest.TestCase):
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.tmp_path = Path(tmp_dir.name)
+
+    def test_mutating_loaded_config_does_not_affect_defaults(self):
+        config_file = self.tmp_path / "config.yaml"
+        config_file.write_text("llm:\n  mode: live\n")
+
+        config = load_config(config_file)
+        self.assertEqual(config["llm"]["mode"], "live")
+        config["llm"]["model"] = "changed"
+        config["github"]["repositories"].append("changed")
+
+        self.assertEqual(DEFAULT_CONFIG["llm"]["mode"], "mock")
+        self.assertEqual(DEFAULT_CONFIG["llm"]["model"], "gemini-pro")
+        self.assertEqual(DEFAULT_CONFIG["github"]["repositories"], [])
+        # Cached results are handed out as copies too
+        self.assertEqual(load_config(config_file)["llm"]["model"], "gemini-pro")
+
+    def test_missing_file_returns_independent_defaults(self):
+        config = load_config(self.tmp_path / "missing.yaml")
+        self.assertEqual(config, DEFAULT_CONFIG)
+        config["database"]["url"] = "sqlite:///changed.db"
+        self.assertEqual(DEFAULT_CONFIG["database"]["url"], "sqlite:///./app.db")
+
+    def test_config_cache_is_bounded(self):
+        for i in range(config_module._CONFIG_CACHE_MAXSIZE + 5):
+            config_file = self.tmp_path / f"config_{i}.yaml"
+            config_file.write_text(f"llm:\n  temperature: {i}\n")
+            self.assertEqual(load_config(config_file)["llm"]["temperature"], i)
+        self.assertLessEqual(len(config_module._CONFIG_CACHE), config_module._CONFIG_CACHE_MAXSIZE)
+
+    def test_spellings_of_one_path_share_a_cache_entry(self):
+        (self.tmp_path / "config.yaml").write_text("llm:\n  mode: live\n")
+        cwd = os.getcwd()
+        os.chdir(self.tmp_path)
+        self.addCleanup(os.chdir, cwd)
+        with patch.object(config_module.yaml, "load", wraps=config_module.yaml.load) as yaml_load:
+            for config_file in (Path("config.yaml"), Path("./config.yaml"), self.tmp_path / "config.yaml"):
+                self.assertEqual(load_config(config_file)["llm"]["mode"], "live")
+        yaml_load.assert_called_once()
+
+
+
+if __name__ == '__main__':
+    unittest.main()
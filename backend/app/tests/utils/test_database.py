@@ -0,0 +1,217 @@
+import asyncio
+import gc
+import sqlite3
+import tempfile
+import time
+import unittest
+import weakref
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from freezegun import freeze_time
+from pymongo.errors import AutoReconnect, BulkWriteError
+
+from app.utils.database import DatabaseManager
+
+
+def _track(track_id: int, timestamp: float, speed: float = 50.0) -> dict:
+    return {"feed_id": "feed1", "track_id": track_id, "timestamp": timestamp, "class_id": 2, "speed": speed}
+
+
+class DatabaseManagerTestCase(unittest.TestCase):
+    """Runs each test against a fresh SQLite file in a temporary directory (MongoDB not configured)."""
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.db = DatabaseManager({"database": {"db_path": str(Path(tmp_dir.name) / "test.db")}})
+        self.addCleanup(self.db.close)
+
+
+class TestVehicleStatsCache(DatabaseManagerTestCase):
+
+    def test_results_are_reused_within_the_ttl_and_refreshed_after(self):
+        with freeze_time("2024-01-17 12:00:00") as frozen:
+            now = frozen().timestamp()
+            self.db.save_vehicle_data_batch([_track(1, now - 10)])
+            self.assertEqual(self.db.get_vehicle_stats()["total_vehicles"], 1)
+
+            self.db.save_vehicle_data_batch([_track(2, now - 5)])
+            frozen.tick(1.0) # Same 2-second bucket: served from the cache
+            self.assertEqual(self.db.get_vehicle_stats()["total_vehicles"], 1)
+
+            frozen.tick(2.0) # Next bucket: queried again
+            self.assertEqual(self.db.get_vehicle_stats()["total_vehicles"], 2)
+
+    def test_arguments_are_part_of_the_key(self):
+        with freeze_time("2024-01-17 12:00:00") as frozen:
+            now = frozen().timestamp()
+            self.db.save_vehicle_data_batch([_track(1, now - 10), _track(2, now - 100)])
+            self.assertEqual(self.db.get_vehicle_stats(time_window_secs=60)["total_vehicles"], 1)
+            self.assertEqual(self.db.get_vehicle_stats(time_window_secs=300)["total_vehicles"], 2)
+
+    def test_callers_get_independent_copies(self):
+        with freeze_time("2024-01-17 12:00:00"):
+            stats = self.db.get_vehicle_stats()
+            stats["total_vehicles"] = 99
+            self.assertEqual(self.db.get_vehicle_stats()["total_vehicles"], 0)
+
+    def test_failed_queries_are_not_cached(self):
+        with freeze_time("2024-01-17 12:00:00"):
+            with patch.object(self.db, "_conn", side_effect=sqlite3.OperationalError("database is locked")):
+                self.assertEqual(self.db.get_vehicle_counts_by_type(), {})
+            counts = self.db.get_vehicle_counts_by_type()
+            self.assertIn("unknown", counts)
+
+    def test_cache_does_not_keep_the_manager_alive(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db = DatabaseManager({"database": {"db_path": str(Path(tmp_dir) / "other.db")}})
+            db.get_vehicle_stats()
+            db.close()
+            ref = weakref.ref(db)
+            del db
+            gc.collect()
+            self.assertIsNone(ref())
+
+
+class TestListAndCountAlerts(DatabaseManagerTestCase):
+
+    def setUp(self):
+        super().setUp()
+        # Explicit, increasing timestamps so the ORDER BY timestamp DESC paging is deterministic
+        with self.db._conn() as conn:
+            conn.executemany(
+                "INSERT INTO alerts (timestamp, severity, feed_id, message) VALUES (?, ?, ?, ?)",
+                [(1700000000.0 + i, "WARNING" if i % 2 else "INFO", "feed1", f"alert {i}") for i in range(5)],
+            )
+
+    def test_page_and_total_come_from_one_query(self):
+        alerts, total = self.db._execute_list_and_count_alerts_filtered({}, limit=2, offset=0)
+        self.assertEqual(total, 5)
+        self.assertEqual([a["message"] for a in alerts], ["alert 4", "alert 3"])
+        self.assertEqual(set(alerts[0]), {"id", "timestamp", "severity", "feed_id", "message", "details", "acknowledged"})
+
+    def test_total_respects_filters(self):
+        alerts, total = self.db._execute_list_and_count_alerts_filtered({"severity": "WARNING"}, limit=1, offset=1)
+        self.assertEqual(total, 2)
+        self.assertEqual([a["message"] for a in alerts], ["alert 1"])
+
+    def test_page_past_the_end_falls_back_to_a_count(self):
+        with patch.object(self.db, "_execute_count_alerts_filtered", wraps=self.db._execute_count_alerts_filtered) as count:
+            alerts, total = self.db._execute_list_and_count_alerts_filtered({}, limit=2, offset=10)
+        self.assertEqual(alerts, [])
+        self.assertEqual(total, 5)
+        count.assert_called_once_with({})
+
+    def test_empty_first_page_reports_zero_without_a_count(self):
+        with patch.object(self.db, "_execute_count_alerts_filtered") as count:
+            alerts, total = self.db._execute_list_and_count_alerts_filtered({"feed_id": "missing"}, limit=2, offset=0)
+        self.assertEqual((alerts, total), ([], 0))
+        count.assert_not_called()
+
+    def test_async_wrapper_matches_separate_queries(self):
+        filters = {"search": "alert"}
+        alerts, total = asyncio.run(self.db.list_and_count_alerts_filtered(filters, limit=3, offset=1))
+        self.assertEqual(total, self.db._execute_count_alerts_filtered(filters))
+        self.assertEqual(alerts, self.db._execute_get_alerts_filtered(filters, 3, 1))
+
+
+class TestRawTrafficBuffer(DatabaseManagerTestCase):
+    """Raw traffic buffering against a mocked collection; MongoDB itself is not needed."""
+
+    def setUp(self):
+        super().setUp()
+        self.coll = MagicMock()
+        self.coll.write_concern.acknowledged = True
+        self.db.mongo_db = MagicMock()
+        self.db._raw_traffic_coll = self.coll
+        self.db.mongo_batch_size = 3
+        # No backoff sleeps between retries
+        sleep_patch = patch.object(DatabaseManager._insert_raw_traffic.retry, "sleep", lambda seconds: None)
+        sleep_patch.start()
+        self.addCleanup(sleep_patch.stop)
+        self.addCleanup(self.db._stop_traffic_flusher)
+
+    def _inserted_docs(self, call_index: int = -1):
+        return self.coll.insert_many.call_args_list[call_index].args[0]
+
+    def test_batch_is_written_once_full_without_touching_caller_dicts(self):
+        docs = [{"sensor_id": f"s{i}"} for i in range(3)]
+        for doc in docs:
+            self.assertTrue(self.db.save_raw_traffic_data_mongo(doc))
+        self.coll.insert_many.assert_called_once()
+        self.assertEqual([d["sensor_id"] for d in self._inserted_docs()], ["s0", "s1", "s2"])
+        self.assertTrue(all("_id" in d for d in self._inserted_docs()))
+        self.assertTrue(all("_id" not in d for d in docs))
+        self.assertEqual(self.db._pending_traffic, [])
+
+    def test_quiet_feed_is_flushed_by_the_background_thread(self):
+        self.db.mongo_flush_interval_secs = 0.1
+        self.db.save_raw_traffic_data_mongo({"sensor_id": "s0"})
+        deadline = time.monotonic() + 5
+        while not self.coll.insert_many.called and time.monotonic() < deadline:
+            time.sleep(0.02)
+        self.coll.insert_many.assert_called_once()
+        self.assertEqual(self.db._pending_traffic, [])
+
+    def test_batch_is_kept_when_mongo_stays_unreachable(self):
+        self.coll.insert_many.side_effect = AutoReconnect("down")
+        for i in range(3):
+            self.db.save_raw_traffic_data_mongo({"sensor_id": f"s{i}"})
+        self.assertEqual(self.coll.insert_many.call_count, 3) # All retries used
+        self.assertEqual(len(self.db._pending_traffic), 3)
+        self.assertFalse(self.db.flush_raw_traffic_data_mongo()) # The failure is reported by an explicit flush
+
+        self.coll.insert_many.side_effect = None
+        self.assertTrue(self.db.flush_raw_traffic_data_mongo())
+        first_ids = [d["_id"] for d in self._inserted_docs(0)]
+        self.assertEqual([d["_id"] for d in self._inserted_docs()], first_ids) # Same ids on every attempt
+        self.assertEqual(self.db._pending_traffic, [])
+
+    def test_non_transient_errors_drop_the_batch_and_transient_ones_keep_it(self):
+        self.db.mongo_batch_size = 1
+        self.db.mongo_flush_interval_secs = 0 # No retry delay between the two saves
+        self.coll.insert_many.side_effect = ValueError("cannot encode")
+        self.db.save_raw_traffic_data_mongo({"sensor_id": "bad"})
+        self.assertEqual(self.coll.insert_many.call_count, 1) # Failed fast, no retries
+        self.assertEqual(self.db._pending_traffic, [])
+
+        self.coll.insert_many.side_effect = AutoReconnect("down")
+        self.db.save_raw_traffic_data_mongo({"sensor_id": "s0"})
+        self.assertEqual([doc["sensor_id"] for doc, _ in self.db._pending_traffic], ["s0"])
+
+    def test_batch_is_kept_while_mongo_is_not_initialized(self):
+        self.db._pending_traffic = [({"sensor_id": "s0"}, True)]
+        self.db.mongo_db = None
+        self.assertFalse(self.db.flush_raw_traffic_data_mongo())
+        self.assertEqual(len(self.db._pending_traffic), 1)
+        self.coll.insert_many.assert_not_called()
+
+    def test_retry_after_partial_write_treats_own_duplicates_as_written(self):
+        duplicate = BulkWriteError({"writeErrors": [{"index": 0, "code": 11000, "errmsg": "E11000 duplicate key"}]})
+        self.coll.insert_many.side_effect = [AutoReconnect("connection reset"), duplicate]
+        self.assertTrue(self.db.save_raw_traffic_data_mongo_batch([{"sensor_id": "s0"}, {"sensor_id": "s1"}]))
+        self.assertEqual(self.coll.insert_many.call_count, 2)
+
+    def test_duplicates_of_caller_supplied_ids_are_still_failures(self):
+        self.coll.insert_many.side_effect = BulkWriteError({"writeErrors": [{"index": 0, "code": 11000, "errmsg": "E11000 duplicate key"}]})
+        self.assertFalse(self.db.save_raw_traffic_data_mongo_batch([{"_id": "fixed", "sensor_id": "s0"}]))
+
+    def test_saves_after_a_failed_write_keep_buffering_until_the_retry_delay(self):
+        self.coll.insert_many.side_effect = AutoReconnect("down")
+        results = [self.db.save_raw_traffic_data_mongo({"sensor_id": f"s{i}"}) for i in range(5)]
+        self.assertEqual(results, [True] * 5) # Every document was buffered, even the one whose flush failed
+        self.assertEqual(self.coll.insert_many.call_count, 3) # Only the first full batch was attempted
+        self.assertEqual([doc["sensor_id"] for doc, _ in self.db._pending_traffic], ["s0", "s1", "s2", "s3", "s4"])
+
+    def test_requeued_backlog_is_capped(self):
+        self.coll.insert_many.side_effect = AutoReconnect("down")
+        self.db.mongo_max_pending = 4
+        self.db.mongo_flush_interval_secs = 0 # Retry on every full batch
+        for i in range(6):
+            self.db.save_raw_traffic_data_mongo({"sensor_id": f"s{i}"})
+        self.assertEqual([doc["sensor_id"] for doc, _ in self.db._pending_traffic], ["s2", "s3", "s4", "s5"])
+
+
+if __name__ == '__main__':
+    unittest.main()
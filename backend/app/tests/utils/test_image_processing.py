@@ -0,0 +1,153 @@
+import unittest
+from concurrent.futures import Future, ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+import cv2
+import numpy as np
+from freezegun import freeze_time
+
+from app.utils import image_processing
+from app.utils.image_processing import LicensePlatePreprocessor
+
+
+def _plate(text: str) -> np.ndarray:
+    roi = np.zeros((100, 300, 3), dtype=np.uint8)
+    cv2.putText(roi, text, (20, 70), cv2.FONT_HERSHEY_SIMPLEX, 2, (255, 255, 255), 4)
+    return roi
+
+
+def _dhash(roi: np.ndarray) -> bytes:
+    """The 9x8 difference hash the OCR cache used to be keyed by."""
+    small = cv2.resize(cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY), (9, 8), interpolation=cv2.INTER_AREA)
+    return np.packbits(small[:, 1:] > small[:, :-1]).tobytes()
+
+
+class TestOcrCache(unittest.TestCase):
+    """OCR itself is mocked; no Gemini key or Tesseract install is needed."""
+
+    def setUp(self):
+        self.preprocessor = LicensePlatePreprocessor({"ocr_engine": {"ocr_cache_ttl_secs": 2.0}})
+        ocr_patch = patch.object(self.preprocessor, "_ocr_roi", side_effect=lambda roi: f"PLATE{int(roi.sum())}")
+        self.ocr = ocr_patch.start()
+        self.addCleanup(ocr_patch.stop)
+
+    def test_identical_roi_is_served_from_the_cache(self):
+        with freeze_time("2024-01-17 12:00:00"):
+            first = self.preprocessor.preprocess_and_ocr(_plate("ABC123"))
+            self.assertEqual(self.preprocessor.preprocess_and_ocr(_plate("ABC123")), first)
+        self.ocr.assert_called_once()
+
+    def test_different_plates_with_the_same_hash_do_not_share_a_result(self):
+        plate_a = _plate("ABC123")
+        plate_b = plate_a.copy()
+        plate_b[50, 150:153] = (255 - plate_b[50, 150:153]) # A few pixels flipped: same thumbnail, different plate
+        self.assertEqual(_dhash(plate_a), _dhash(plate_b))
+
+        with freeze_time("2024-01-17 12:00:00"):
+            text_a = self.preprocessor.preprocess_and_ocr(plate_a)
+            text_b = self.preprocessor.preprocess_and_ocr(plate_b)
+        self.assertNotEqual(text_a, text_b)
+        self.assertEqual(self.ocr.call_count, 2)
+
+    def test_entries_expire_after_the_ttl(self):
+        roi = _plate("ABC123")
+        with freeze_time("2024-01-17 12:00:00") as frozen:
+            self.preprocessor.preprocess_and_ocr(roi)
+            frozen.tick(1.5)
+            self.preprocessor.preprocess_and_ocr(roi)
+            self.assertEqual(self.ocr.call_count, 1)
+            frozen.tick(1.0)
+            self.preprocessor.preprocess_and_ocr(roi)
+            self.assertEqual(self.ocr.call_count, 2)
+
+    def test_empty_reads_are_not_cached(self):
+        self.ocr.side_effect = ["", "ABC123"]
+        roi = _plate("ABC123")
+        with freeze_time("2024-01-17 12:00:00"):
+            self.assertEqual(self.preprocessor.preprocess_and_ocr(roi), "")
+            self.assertEqual(self.preprocessor.preprocess_and_ocr(roi), "ABC123")
+
+
+class TestPreprocessForTesseract(unittest.TestCase):
+
+    def setUp(self):
+        self.preprocessor = LicensePlatePreprocessor({"ocr_engine": {"tesseract_max_roi_width": 200}})
+
+    def test_wide_roi_is_capped(self):
+        processed = self.preprocessor._preprocess_for_tesseract(_plate("ABC123"))
+        self.assertEqual(processed.shape, (67, 200))
+
+    def test_size_check_applies_after_the_width_cap(self):
+        # 12 px tall passes the minimum as given, but is 6 px tall once capped to 200 px wide
+        self.assertIsNone(self.preprocessor._preprocess_for_tesseract(np.zeros((12, 400, 3), dtype=np.uint8)))
+        self.assertIsNotNone(self.preprocessor._preprocess_for_tesseract(np.zeros((20, 400, 3), dtype=np.uint8)))
+
+
+class TestOcrFallbackOrder(unittest.TestCase):
+    """Gemini first, Tesseract only when Gemini has no answer. Both engines are mocked."""
+
+    def setUp(self):
+        self.preprocessor = LicensePlatePreprocessor({"ocr_engine": {"ocr_cache_size": 0}})
+        self.addCleanup(self.preprocessor.close)
+        # Stand in for an initialized Gemini model (constructing one needs google-generativeai and a key)
+        self.preprocessor.model = MagicMock()
+        self.preprocessor.gemini_api_key = "test-key"
+        gemini_patch = patch.object(self.preprocessor, "_call_gemini_ocr", return_value="GEMINI1")
+        self.gemini = gemini_patch.start()
+        self.addCleanup(gemini_patch.stop)
+        tesseract_patch = patch.object(self.preprocessor, "_tesseract_ocr", return_value="TESS1")
+        self.tesseract = tesseract_patch.start()
+        self.addCleanup(tesseract_patch.stop)
+        pytesseract_patch = patch.object(image_processing, "_get_pytesseract", return_value=MagicMock())
+        pytesseract_patch.start()
+        self.addCleanup(pytesseract_patch.stop)
+        self.roi = _plate("ABC123")
+
+    def _use_executor(self):
+        executor = ThreadPoolExecutor(max_workers=1)
+        self.preprocessor._tesseract_executor = executor
+        return executor
+
+    def test_speculative_tesseract_is_off_by_default(self):
+        self.assertFalse(self.preprocessor.parallel_tesseract)
+        self.assertIsNone(self.preprocessor._tesseract_executor)
+
+    def test_gemini_result_skips_tesseract(self):
+        self.assertEqual(self.preprocessor.preprocess_and_ocr(self.roi), "GEMINI1")
+        self.gemini.assert_called_once()
+        self.tesseract.assert_not_called()
+
+    def test_tesseract_runs_when_gemini_has_no_answer(self):
+        self.gemini.return_value = ""
+        self.assertEqual(self.preprocessor.preprocess_and_ocr(self.roi), "TESS1")
+        self.tesseract.assert_called_once()
+
+    def test_gemini_result_wins_and_cancels_the_speculative_run(self):
+        future = MagicMock(spec=Future)
+        executor = self._use_executor()
+        with patch.object(executor, "submit", return_value=future) as submit:
+            self.assertEqual(self.preprocessor.preprocess_and_ocr(self.roi), "GEMINI1")
+        submit.assert_called_once()
+        future.cancel.assert_called_once()
+        future.result.assert_not_called()
+
+    def test_speculative_run_is_used_when_gemini_has_no_answer(self):
+        self.gemini.return_value = ""
+        self._use_executor()
+        self.assertEqual(self.preprocessor.preprocess_and_ocr(self.roi), "TESS1")
+        self.tesseract.assert_called_once() # On the worker, not again inline
+
+    def test_close_shuts_the_executor_down(self):
+        executor = self._use_executor()
+        self.preprocessor.close()
+        self.assertIsNone(self.preprocessor._tesseract_executor)
+        with self.assertRaises(RuntimeError):
+            executor.submit(print)
+        # Still falls back to Tesseract, now inline
+        self.gemini.return_value = ""
+        self.assertEqual(self.preprocessor.preprocess_and_ocr(self.roi), "TESS1")
+        self.preprocessor.close() # Idempotent
+
+
+if __name__ == '__main__':
+    unittest.main()
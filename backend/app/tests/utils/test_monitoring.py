@@ -0,0 +1,59 @@
+import unittest
+from unittest.mock import patch
+
+from app.utils import monitoring
+from app.utils.monitoring import TrafficMonitor
+
+_CONFIG = {
+    "speed_limit": 50.0,
+    "incident_detection": {"density_threshold": 5, "congestion_speed_threshold": 15.0},
+    "stopped_speed_threshold_kmh": 3.0,
+}
+
+
+def _frame(count: int) -> dict:
+    """Vehicles covering known, unmapped, None and missing class_id / lane values as well as missing speeds."""
+    class_ids = (2, 3, 5, 7, 4, None, "car", 2.0, -1)
+    lanes = (1, 2, None, 3, "left", 1)
+    vehicles = {}
+    for track_id in range(count):
+        data = {"speed": float(track_id % 70)}
+        if track_id % 11:
+            data["class_id"] = class_ids[track_id % len(class_ids)]
+        if track_id % 7:
+            data["lane"] = lanes[track_id % len(lanes)]
+        if track_id % 13 == 0:
+            del data["speed"]
+        vehicles[track_id] = data
+    return vehicles
+
+
+class TestTrafficMonitorPaths(unittest.TestCase):
+    """The small-frame Python pass and the vectorized (NumPy / numba) paths must report the same metrics."""
+
+    def _metrics(self, vehicles: dict, min_vehicles: int, reduce_frame_jit) -> dict:
+        monitor = TrafficMonitor(_CONFIG)
+        with patch.object(monitoring, "_VECTORIZE_MIN_VEHICLES", min_vehicles), \
+                patch.object(monitoring, "_reduce_frame_jit", reduce_frame_jit):
+            monitor.update_vehicles(vehicles)
+            return monitor.get_metrics()
+
+    def test_all_paths_agree(self):
+        vectorized = {"numpy": None}
+        if monitoring._reduce_frame_jit is not None:
+            vectorized["numba"] = monitoring._reduce_frame_jit
+        for count in (0, 1, 10, 40, 200):
+            vehicles = _frame(count)
+            expected = self._metrics(vehicles, count + 1, None) # Frame below the threshold: Python pass
+            for name, reduce_frame_jit in vectorized.items():
+                with self.subTest(count=count, path=name):
+                    self.assertEqual(self._metrics(vehicles, 0, reduce_frame_jit), expected)
+
+    def test_invalid_ids_count_as_unknown(self):
+        metrics = self._metrics({1: {"speed": 10.0, "class_id": None, "lane": None}, 2: {"speed": 10.0}}, 0, None)
+        self.assertEqual(metrics["vehicle_type_counts"]["unknown"], 2)
+        self.assertEqual(metrics["vehicles_per_lane"], {})
+
+
+if __name__ == '__main__':
+    unittest.main()
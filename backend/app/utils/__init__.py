@@ -6,30 +6,57 @@ Utility package for the application.
 This __init__.py file re-exports key components from the various utility modules,
 making them available directly under the `app.utils` namespace. This provides a
 stable API even after internal refactoring of the utility modules.
+
+Only the lightweight config helpers are imported eagerly. Everything else is
+resolved on first attribute access (PEP 562), so importing `app.utils` for
+`load_config` does not pull in OpenCV, NumPy, psutil or the database drivers.
 """
 
+import importlib
 import logging # Keep logging if the __init__ itself logs.
 
 # Import from .config module
 from .config import ConfigError, load_config, DEFAULT_CONFIG, merge_dicts
 
-# Import from .database module
-from .database import DatabaseError, DatabaseManager
+# Lazily re-exported names, mapped to the submodule that defines them
+_LAZY_IMPORTS = {
+    # From database.py
+    'DatabaseError': '.database',
+    'DatabaseManager': '.database',
+
+    # From image_processing.py
+    'LicensePlatePreprocessor': '.image_processing',
+
+    # From video.py
+    'FrameReader': '.video',
+    'FrameTimer': '.video',
+
+    # From visualization.py
+    'visualize_data': '.visualization',
+    'create_lane_overlay': '.visualization',
+    'create_grid_overlay': '.visualization',
+    'alpha_blend': '.visualization',
+
+    # From monitoring.py
+    'TrafficMonitor': '.monitoring',
 
-# Import from .image_processing module
-from .image_processing import LicensePlatePreprocessor
+    # From utils.py (the refactored utils.py which now only contains check_system_resources)
+    'check_system_resources': '.utils',
+    'Resources': '.utils',
+}
 
-# Import from .video module
-from .video import FrameReader, FrameTimer
 
-# Import from .visualization module
-from .visualization import visualize_data, create_lane_overlay, create_grid_overlay, alpha_blend
+def __getattr__(name):
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value # Cache so later lookups bypass __getattr__
+    return value
 
-# Import from .monitoring module
-from .monitoring import TrafficMonitor
 
-# Import from .utils module (the refactored utils.py which now only contains check_system_resources)
-from .utils import check_system_resources
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_IMPORTS))
 
 
 logger = logging.getLogger(__name__)
@@ -68,5 +95,6 @@ __all__ = [
     'TrafficMonitor',
 
     # From utils.py (the remaining part of the original utils)
-    'check_system_resources'
+    'check_system_resources',
+    'Resources',
 ]
\ No newline at end of file
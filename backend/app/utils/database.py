@@ -1,25 +1,38 @@
 import asyncio
+import copy
+import json
+import queue
 import sqlite3
+import sys
 import threading
 import logging
 import time
+from collections import namedtuple
+from operator import itemgetter
 from pathlib import Path
-from typing import List, Dict, Optional, Any
-from functools import lru_cache
+from typing import List, Dict, Optional, Any, AsyncContextManager, AsyncIterator, Iterator, Tuple
+from functools import lru_cache, wraps
 from tenacity import retry, wait_exponential, stop_after_attempt, retry_if_exception_type, RetryError
 from contextlib import asynccontextmanager, contextmanager
 
+from sqlalchemy import create_engine
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
-from pymongo import MongoClient
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from bson import ObjectId
+from pymongo import MongoClient, WriteConcern
+from pymongo.collection import Collection as MongoCollection
 from pymongo.database import Database as MongoDatabase
-from pymongo.errors import ConnectionFailure, ConfigurationError as MongoConfigurationError
+from pymongo.errors import (
+    AutoReconnect, BulkWriteError, ConnectionFailure, ConfigurationError as MongoConfigurationError, NetworkTimeout,
+    ServerSelectionTimeoutError,
+)
 
 # Attempt to import TrafficMonitor from where it's planned to be
-from ..monitoring import TrafficMonitor
+from .monitoring import TrafficMonitor
 # No longer need the placeholder class TrafficMonitor here
 
-from ..config import DEFAULT_CONFIG, ConfigError # ConfigError might be needed if _init_from_config raises it
+from .config import DEFAULT_CONFIG, ConfigError # ConfigError might be needed if _init_from_config raises it
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +40,185 @@ class DatabaseError(Exception):
     """Custom exception for database operation errors."""
     pass
 
+# Applied to every new SQLite connection. All of these are safe under WAL:
+# 64 MiB page cache, 256 MiB mmap, in-memory temp tables, and a 5 s busy wait.
+# page_size must come before journal_mode: it only applies to a database that has not been written yet
+# (8 KiB pages suit the append-heavy tables), and once a file is in WAL mode it can no longer be changed,
+# so for existing databases it is a no-op.
+_SQLITE_PRAGMAS = """
+PRAGMA page_size=8192;
+PRAGMA journal_mode=WAL;
+PRAGMA synchronous=NORMAL;
+PRAGMA temp_store=MEMORY;
+PRAGMA mmap_size=268435456;
+PRAGMA cache_size=-65536;
+PRAGMA busy_timeout=5000;
+PRAGMA wal_autocheckpoint=1000;
+"""
+
+_VEHICLE_TRACK_COLUMNS = (
+    "feed_id", "track_id", "timestamp", "class_id", "confidence", "bbox_x1", "bbox_y1", "bbox_x2", "bbox_y2",
+    "center_x", "center_y", "speed", "acceleration", "lane", "direction", "license_plate", "ocr_confidence", "flags",
+)
+_INSERT_VEHICLE_TRACK_SQL = (
+    f"INSERT OR REPLACE INTO vehicle_tracks ({','.join(_VEHICLE_TRACK_COLUMNS)}) "
+    f"VALUES ({','.join('?' * len(_VEHICLE_TRACK_COLUMNS))})"
+)
+# Read-side row types. Rows are built straight from the cursor's tuples instead of going through sqlite3.Row.
+# VehicleTrackRow is a slotted namedtuple; call ._asdict() where a mapping is needed (e.g. JSON responses).
+VehicleTrackRow = namedtuple("VehicleTrackRow", _VEHICLE_TRACK_COLUMNS)
+_SELECT_TRACKS_SQL = f"SELECT {','.join(_VEHICLE_TRACK_COLUMNS)} FROM vehicle_tracks"
+# Alerts stay dicts: callers unpack them into AlertModel(**alert) and read them with .get()
+_ALERT_COLUMNS = ("id", "timestamp", "severity", "feed_id", "message", "details", "acknowledged")
+_SELECT_ALERTS_SQL = f"SELECT {', '.join(_ALERT_COLUMNS)} FROM alerts"
+
+def _track_row_factory(cursor: sqlite3.Cursor, row: Tuple) -> VehicleTrackRow:
+    return VehicleTrackRow._make(row)
+
+def _alert_row_factory(cursor: sqlite3.Cursor, row: Tuple) -> Dict[str, Any]:
+    return dict(zip(_ALERT_COLUMNS, row))
+
+_STATS_SQL = (
+    "SELECT COUNT(*) as total_vehicles, AVG(speed) as average_speed_kmh, "
+    "SUM(CASE WHEN speed < ? THEN 1 ELSE 0 END) as stopped_vehicles FROM vehicle_tracks WHERE timestamp > ?"
+)
+
+# MongoDB failures worth retrying; anything else (bad documents, programming errors) fails immediately
+_MONGO_TRANSIENT_ERRORS = (AutoReconnect, NetworkTimeout, ServerSelectionTimeoutError)
+_MONGO_QUERY_CACHE_MAXSIZE = 256
+_MONGO_DUPLICATE_KEY = 11000
+_TTL_CACHE_MAXSIZE = 64
+
+_INSERT_ALERT_SQL = "INSERT INTO alerts (severity,feed_id,message,details) VALUES (?,?,?,?)"
+
+_NO_BBOX = (None, None, None, None)
+_NO_CENTER = (None, None)
+# Feed IDs repeat across thousands of rows; intern each distinct one so rows share a single str object
+_interned_feed_ids: Dict[str, str] = {}
+_get_vehicle_fields = itemgetter(
+    'feed_id', 'track_id', 'timestamp', 'class_id', 'confidence', 'bbox', 'center', 'speed', 'acceleration',
+    'lane', 'direction', 'license_plate', 'ocr_confidence', 'flags',
+)
+
+def _vehicle_track_row(vd: Dict) -> Tuple:
+    """
+    Flatten a vehicle data dict into a parameter tuple in _VEHICLE_TRACK_COLUMNS order.
+    Complete dicts are read with one itemgetter call; partial ones fall back to per-field defaults.
+    `flags` given as a tuple is taken to be sorted already; sets and lists are sorted here.
+    """
+    try:
+        feed_id, track_id, ts, class_id, conf, bbox, center, speed, accel, lane, direction, plate, ocr_conf, flags = _get_vehicle_fields(vd)
+    except KeyError:
+        get = vd.get
+        feed_id, track_id, ts, class_id, conf, bbox, center, speed, accel, lane, direction, plate, ocr_conf, flags = (
+            get('feed_id', 'unknown'), get('track_id'), vd['timestamp'] if 'timestamp' in vd else time.time(),
+            get('class_id'), get('confidence'), get('bbox', _NO_BBOX), get('center', _NO_CENTER), get('speed'),
+            get('acceleration'), get('lane'), get('direction'), get('license_plate'), get('ocr_confidence'), get('flags', ()))
+    if type(feed_id) is str:
+        feed_id = _interned_feed_ids.get(feed_id) or _interned_feed_ids.setdefault(feed_id, sys.intern(feed_id))
+    return (feed_id, track_id, ts, class_id, conf, bbox[0], bbox[1], bbox[2], bbox[3], center[0], center[1],
+            speed, accel, lane, direction, plate, ocr_conf, ','.join(flags if type(flags) is tuple else sorted(flags)))
+
+_ALERT_FILTER_CLAUSES = {
+    "acknowledged": "acknowledged = ?",
+    "severity": "severity = ?",
+    "feed_id": "feed_id = ?",
+    "search": "message LIKE ?",
+    "start_time": "timestamp >= ?",
+    "end_time": "timestamp <= ?",
+}
+
+@lru_cache(maxsize=64)
+def _alerts_where_sql(shape: Tuple) -> str:
+    """Build the AND-clause suffix for a filter shape (the filters present, not their values)."""
+    conds = []
+    for key in shape:
+        if isinstance(key, tuple): # ("severity_in", number_of_values)
+            conds.append(f"severity IN ({', '.join('?' * key[1])})")
+        else:
+            conds.append(_ALERT_FILTER_CLAUSES[key])
+    return " AND " + " AND ".join(conds) if conds else ""
+
+def _build_alerts_where(filters: Dict) -> Tuple[str, List]:
+    """
+    Translate alert filters into a WHERE suffix and its parameters. Clauses are emitted in a fixed order,
+    so the same filter shape always yields the same SQL text and hits SQLite's statement cache.
+    """
+    shape = []; params = []
+    if filters.get("acknowledged") is not None:
+        shape.append("acknowledged"); params.append(1 if filters["acknowledged"] else 0)
+    if filters.get("severity"):
+        shape.append("severity"); params.append(filters["severity"])
+    severity_in = filters.get("severity_in")
+    if severity_in and isinstance(severity_in, list):
+        shape.append(("severity_in", len(severity_in))); params.extend(severity_in)
+    if filters.get("feed_id") is not None:
+        shape.append("feed_id"); params.append(filters["feed_id"])
+    search = filters.get("search")
+    if isinstance(search, str) and search.strip():
+        shape.append("search"); params.append(f"%{search.strip()}%")
+    for key in ("start_time", "end_time"):
+        if isinstance(filters.get(key), (int, float)):
+            shape.append(key); params.append(filters[key])
+    return _alerts_where_sql(tuple(shape)), params
+
+def _prepare_traffic_doc(doc: Dict) -> Tuple[Dict, bool]:
+    """
+    Return a raw traffic document ready for insert_many and whether its _id was generated here.
+    insert_many adds _id to the dicts it is given, so documents without one are copied (the caller's dict is
+    left untouched) and get an id up front, which keeps it stable across retries and re-flushes.
+    """
+    if "_id" in doc:
+        return doc, False
+    return {**doc, "_id": ObjectId()}, True
+
+def _run_coroutine_in_thread(coro, timeout: float):
+    """
+    Run `coro` on a short-lived event loop in its own thread and wait up to `timeout` seconds for it.
+    Works the same whether or not the calling thread already runs an event loop.
+    """
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, name="db-dispose-loop", daemon=True)
+    thread.start()
+    try:
+        return asyncio.run_coroutine_threadsafe(coro, loop).result(timeout)
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+        if not thread.is_alive():
+            loop.close()
+
+def _ttl_cache(ttl: float = 2.0):
+    """
+    Memoise a method per (instance, arguments) within fixed `ttl`-second time buckets, so every
+    caller in the same bucket shares one query and results are never older than `ttl` seconds.
+    Entries live on the instance (self._ttl_cache_entries), so a cached result never keeps its
+    DatabaseManager alive. Empty (failed) results are not cached, and callers get their own copy.
+    """
+    def decorator(func):
+        name = func.__name__
+
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            bucket = int(time.time() // ttl)
+            key = (name, args, tuple(sorted(kwargs.items())))
+            with self._ttl_cache_lock:
+                hit = self._ttl_cache_entries.get(key)
+            if hit is not None and hit[0] == bucket:
+                return copy.copy(hit[1])
+            result = func(self, *args, **kwargs)
+            if result: # The query methods return {} on error; retry those on the next call instead
+                with self._ttl_cache_lock:
+                    cache = self._ttl_cache_entries
+                    cache[key] = (bucket, result)
+                    if len(cache) > _TTL_CACHE_MAXSIZE:
+                        # Drop entries from earlier buckets so distinct arguments can't grow the cache forever
+                        for stale_key in [k for k, (b, _) in cache.items() if b != bucket]:
+                            del cache[stale_key]
+            return copy.copy(result)
+        return wrapper
+    return decorator
+
 # --- DatabaseManager (Simplified for SQLite) ---
 class DatabaseManager:
     def __init__(self, config: Dict):
@@ -36,12 +228,50 @@ class DatabaseManager:
         self.raw_traffic_collection_name: str = "raw_traffic_data" # Default, can be from config
         self.mongo_client: Optional[MongoClient] = None
         self.mongo_db: Optional[MongoDatabase] = None
-        self._async_engine = None
-        self._async_session_factory = None
+        # Bound once: Database.__getitem__ builds and validates a new Collection wrapper on every call
+        self._raw_traffic_coll: Optional[MongoCollection] = None
+        # Background connectivity/index probe started by _initialize_mongodb; kept so close() can wait for it
+        self._mongo_probe_task: Optional[asyncio.Task] = None
+        self._mongo_probe_thread: Optional[threading.Thread] = None
+        # Raw traffic documents waiting for the next insert_many; see save_raw_traffic_data_mongo
+        # Entries are (document, whether its _id was generated here); see _prepare_traffic_doc
+        self._pending_traffic: List[Tuple[Dict, bool]] = []
+        self._pending_traffic_since: float = 0.0
+        # After a failed write, saves keep buffering without retrying MongoDB until this monotonic time
+        self._traffic_retry_at: float = 0.0
+        self._pending_traffic_lock = threading.Lock()
+        self.mongo_batch_size: int = 500
+        self.mongo_flush_interval_secs: float = 5.0
+        # Upper bound on buffered documents while MongoDB is unreachable; the oldest are dropped beyond it
+        self.mongo_max_pending: int = 50000
+        # Daemon thread that writes out the buffer every mongo_flush_interval_secs; started on the first save
+        self._traffic_flusher: Optional[threading.Thread] = None
+        self._traffic_flusher_stop = threading.Event()
+        # Read-through cache for get_raw_traffic_data_mongo: query key -> (expires_at, docs); cleared on insert
+        self._mongo_query_cache: Dict[str, Tuple[float, List[Dict]]] = {}
+        self._mongo_query_cache_lock = threading.Lock()
+        self.mongo_query_cache_ttl: float = 5.0
+        self.raw_traffic_ttl_secs: Optional[int] = None # Opt-in expiry of raw traffic documents via a TTL index
+        # "w0" sends raw traffic inserts unacknowledged: no round trip per batch, but also no write errors or retries
+        self.raw_traffic_write_concern: str = "w1"
+        self.async_engine = None
+        self.async_session_factory = None
+        self._sync_engine = None
+        self._sync_session_factory = None
+        self.sqlite_pool_size: int = 5
+        # Use DEFAULT_CONFIG from app.utils.config; read once rather than on every stats query
+        self._stopped_threshold_kmh = DEFAULT_CONFIG.get('stopped_speed_threshold_kmh', 5)
+        self.sqlite_pool_recycle_secs: float = 300.0
+        # Per-instance storage for @_ttl_cache methods: (method, args, kwargs) -> (time bucket, result)
+        self._ttl_cache_entries: Dict[Tuple, Tuple[int, Any]] = {}
+        self._ttl_cache_lock = threading.Lock()
 
         # Initialize database connections
         self._init_from_config(config) # This might raise ConfigError or ValueError
-        self.lock = threading.Lock() # Lock for thread-safe operations on SQLite connection
+        # No Python-level write lock: under WAL, SQLite serialises writers itself (contending writers wait up to
+        # PRAGMA busy_timeout for the write lock) and readers are never blocked by writers.
+        # Idle SQLite connections as (connection, last_returned_monotonic); see _conn()
+        self._conn_pool: "queue.Queue[Tuple[sqlite3.Connection, float]]" = queue.Queue(maxsize=self.sqlite_pool_size)
 
         # Initialize databases
         if self.sqlite_db_path:
@@ -52,10 +282,18 @@ class DatabaseManager:
 
         # Async SQLAlchemy setup (only if sqlite_db_path is valid)
         if self.sqlite_db_path:
-            self.async_engine = create_async_engine(f"sqlite+aiosqlite:///{self.sqlite_db_path}")
+            self.async_engine = create_async_engine(
+                f"sqlite+aiosqlite:///{self.sqlite_db_path}",
+                poolclass=AsyncAdaptedQueuePool, pool_pre_ping=True, pool_recycle=300
+            )
             self.async_session_factory = sessionmaker(
                 self.async_engine, class_=AsyncSession, expire_on_commit=False
             )
+            # Sync engine for get_session_sync, built once so its connection pool is actually reused
+            self._sync_engine = create_engine(
+                f"sqlite:///{self.sqlite_db_path}", pool_pre_ping=True, pool_recycle=300
+            )
+            self._sync_session_factory = sessionmaker(autocommit=False, autoflush=False, bind=self._sync_engine)
         else:
             logger.warning("SQLite path not configured. Async SQLAlchemy engine not created.")
 
@@ -87,12 +325,21 @@ class DatabaseManager:
                     raise ConfigError(f"Failed to create database directory {self.sqlite_db_path.parent}: {e}") from e
 
             logger.info(f"SQLite database path configured to: {self.sqlite_db_path}")
+            self.sqlite_pool_size = int(db_config.get("sqlite_pool_size", self.sqlite_pool_size))
+            self.sqlite_pool_recycle_secs = float(db_config.get("sqlite_pool_recycle_secs", self.sqlite_pool_recycle_secs))
 
             mongo_config = config.get("mongodb", {})
             if mongo_config.get("uri") and mongo_config.get("database_name"):
                 self.mongo_uri = mongo_config["uri"]
                 self.mongo_db_name = mongo_config["database_name"]
                 self.raw_traffic_collection_name = mongo_config.get("raw_traffic_collection", "raw_traffic_data")
+                self.mongo_batch_size = int(mongo_config.get("batch_size", self.mongo_batch_size))
+                self.mongo_flush_interval_secs = float(mongo_config.get("flush_interval_secs", self.mongo_flush_interval_secs))
+                self.mongo_max_pending = int(mongo_config.get("max_pending", self.mongo_max_pending))
+                self.mongo_query_cache_ttl = float(mongo_config.get("query_cache_ttl", self.mongo_query_cache_ttl))
+                self.raw_traffic_write_concern = str(mongo_config.get("raw_traffic_write_concern", self.raw_traffic_write_concern)).lower()
+                if mongo_config.get("ttl_secs"):
+                    self.raw_traffic_ttl_secs = int(mongo_config["ttl_secs"])
                 logger.info(f"MongoDB configured: URI='{self.mongo_uri}', DB='{self.mongo_db_name}'")
             else:
                 logger.info("MongoDB not fully configured (URI or database_name missing). MongoDB will not be used.")
@@ -129,15 +376,9 @@ class DatabaseManager:
     @contextmanager
     def get_session_sync(self) -> Any: # Return type can be more specific if only one type of session is returned
         """Get a synchronous database session (for SQLite)."""
-        if not self.sqlite_db_path:
+        if not self._sync_session_factory:
             raise DatabaseError("SQLite database path not configured.")
-        # This import is here because sqlalchemy might not be a hard dependency if only mongo is used.
-        from sqlalchemy.orm import Session as SyncSession, sessionmaker as sync_sessionmaker
-        from sqlalchemy import create_engine as create_sync_engine
-
-        engine = create_sync_engine(f"sqlite:///{self.sqlite_db_path}")
-        SessionLocal = sync_sessionmaker(autocommit=False, autoflush=False, bind=engine)
-        session: SyncSession = SessionLocal()
+        session: Session = self._sync_session_factory()
         try:
             yield session
             session.commit()
@@ -153,25 +394,85 @@ class DatabaseManager:
             raise DatabaseError("SQLite database path not configured.")
         try:
             # Using self.sqlite_db_path which is now a Path object
-            conn = sqlite3.connect(str(self.sqlite_db_path), timeout=10.0)
+            # Pooled connections are handed to whichever thread borrows them next (e.g. asyncio.to_thread),
+            # but only ever to one thread at a time, so the same-thread check is disabled.
+            # Pooled connections live long enough for the statement cache to pay off; the hot SQL is kept in
+            # module constants so every call hits the same cache entry.
+            conn = sqlite3.connect(str(self.sqlite_db_path), timeout=10.0, check_same_thread=False, cached_statements=256)
             conn.row_factory = sqlite3.Row
             try:
-                conn.execute("PRAGMA journal_mode=WAL;")
-                conn.execute("PRAGMA synchronous=NORMAL;")
+                conn.executescript(_SQLITE_PRAGMAS)
             except sqlite3.Error as e:
-                logger.warning(f"Could not set WAL mode on {self.sqlite_db_path}: {e}")
+                logger.warning(f"Could not apply PRAGMA settings on {self.sqlite_db_path}: {e}")
             return conn
         except sqlite3.Error as e:
             logger.error(f"Failed to connect to DB {self.sqlite_db_path}: {e}", exc_info=True)
             raise DatabaseError(f"DB connect fail: {e}") from e
 
+    @contextmanager
+    def _conn(self) -> Iterator[sqlite3.Connection]:
+        """
+        Borrow a pooled SQLite connection, creating one if the pool is empty.
+        Commits on success and rolls back on error, like `with conn:`. Connections idle for longer than
+        `sqlite_pool_recycle_secs` are closed rather than reused, and a connection that raised
+        sqlite3.Error is discarded instead of being returned to the pool.
+        """
+        conn = None
+        now = time.monotonic()
+        while conn is None:
+            try:
+                pooled, last_used = self._conn_pool.get_nowait()
+            except queue.Empty:
+                conn = self._get_sqlite_connection()
+                break
+            if now - last_used > self.sqlite_pool_recycle_secs:
+                self._retire_sqlite_connection(pooled)
+            else:
+                conn = pooled
+        healthy = True
+        try:
+            with conn:
+                yield conn
+        except sqlite3.Error:
+            healthy = False
+            raise
+        finally:
+            if healthy:
+                try:
+                    self._conn_pool.put_nowait((conn, time.monotonic()))
+                except queue.Full:
+                    self._retire_sqlite_connection(conn)
+            else:
+                conn.close()
+
+    @staticmethod
+    def _retire_sqlite_connection(conn: sqlite3.Connection):
+        """Close a healthy connection, first letting SQLite refresh planner statistics (sqlite_stat1) it found stale."""
+        try:
+            conn.execute("PRAGMA optimize;")
+        except sqlite3.Error as e:
+            logger.warning(f"PRAGMA optimize failed on pooled SQLite connection: {e}")
+        try:
+            conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Error closing pooled SQLite connection: {e}")
+
+    def _close_sqlite_pool(self):
+        """Close all idle pooled SQLite connections."""
+        while True:
+            try:
+                conn, _ = self._conn_pool.get_nowait()
+            except queue.Empty:
+                return
+            self._retire_sqlite_connection(conn)
+
     def _initialize_sqlite_database(self):
         if not self.sqlite_db_path:
             logger.error("Cannot initialize SQLite DB: path not set.")
             return
         logger.info(f"Initializing SQLite DB schema at {self.sqlite_db_path}...")
         try:
-            with self._get_sqlite_connection() as conn:
+            with self._conn() as conn:
                 self._create_sqlite_tables(conn.cursor())
             logger.info("SQLite DB schema initialization check complete.")
         except sqlite3.Error as e:
@@ -182,37 +483,49 @@ class DatabaseManager:
             raise DatabaseError(f"Unexpected DB init error: {e}") from e
 
     def _create_sqlite_tables(self, cursor: sqlite3.Cursor):
-        cursor.execute('''CREATE TABLE IF NOT EXISTS vehicle_tracks (
+        # Single script, single transaction: one commit on first boot, and only IF NOT EXISTS checks afterwards
+        cursor.executescript('''
+            BEGIN;
+            CREATE TABLE IF NOT EXISTS vehicle_tracks (
                 feed_id TEXT NOT NULL, track_id INTEGER NOT NULL, timestamp REAL NOT NULL, class_id INTEGER, confidence REAL,
                 bbox_x1 REAL, bbox_y1 REAL, bbox_x2 REAL, bbox_y2 REAL, center_x REAL, center_y REAL, speed REAL,
                 acceleration REAL, lane INTEGER, direction REAL, license_plate TEXT, ocr_confidence REAL, flags TEXT,
-                PRIMARY KEY (feed_id, track_id, timestamp))''')
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_vt_timestamp ON vehicle_tracks(timestamp DESC);")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_vt_feed_track ON vehicle_tracks(feed_id, track_id);")
-        cursor.execute('''CREATE TABLE IF NOT EXISTS alerts (
+                PRIMARY KEY (feed_id, track_id, timestamp));
+            CREATE INDEX IF NOT EXISTS idx_vt_timestamp ON vehicle_tracks(timestamp DESC);
+            CREATE INDEX IF NOT EXISTS idx_vt_feed_track ON vehicle_tracks(feed_id, track_id);
+            -- Covers get_vehicle_counts_by_type: latest class_id per track straight from the index
+            CREATE INDEX IF NOT EXISTS idx_vt_feed_track_ts_class ON vehicle_tracks(feed_id, track_id, timestamp DESC, class_id);
+
+            CREATE TABLE IF NOT EXISTS alerts (
                 id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp REAL NOT NULL DEFAULT (unixepoch('now', 'subsec')),
                 severity TEXT NOT NULL CHECK(severity IN ('INFO', 'WARNING', 'CRITICAL')), feed_id TEXT NOT NULL,
-                message TEXT NOT NULL, details TEXT, acknowledged INTEGER DEFAULT 0 NOT NULL CHECK(acknowledged IN (0, 1)))''')
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_alerts_timestamp ON alerts(timestamp DESC);")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_alerts_feed_severity ON alerts(feed_id, severity);")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_alerts_acknowledged ON alerts(acknowledged);")
-
-        cursor.execute('''CREATE TABLE IF NOT EXISTS raw_traffic_data (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp TEXT NOT NULL,
-            sensor_id TEXT NOT NULL,
-            latitude REAL NOT NULL,
-            longitude REAL NOT NULL,
-            speed REAL,
-            occupancy REAL,
-            vehicle_count INTEGER
-        )''')
-        cursor.execute('''CREATE TABLE IF NOT EXISTS processed_traffic_data (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            segment_id TEXT NOT NULL,
-            timestamp TEXT NOT NULL,
-            congestion_level REAL NOT NULL
-        )''')
+                message TEXT NOT NULL, details TEXT, acknowledged INTEGER DEFAULT 0 NOT NULL CHECK(acknowledged IN (0, 1)));
+            CREATE INDEX IF NOT EXISTS idx_alerts_timestamp ON alerts(timestamp DESC);
+            CREATE INDEX IF NOT EXISTS idx_alerts_feed_severity ON alerts(feed_id, severity);
+            -- Unacknowledged-alert polling (acknowledged = 0 ORDER BY timestamp DESC) and feed + time ordering
+            -- read straight off these indexes; they replace the low-selectivity idx_alerts_acknowledged.
+            DROP INDEX IF EXISTS idx_alerts_acknowledged;
+            CREATE INDEX IF NOT EXISTS idx_alerts_unacked_ts ON alerts(timestamp DESC) WHERE acknowledged = 0;
+            CREATE INDEX IF NOT EXISTS idx_alerts_feed_ts ON alerts(feed_id, timestamp DESC);
+
+            CREATE TABLE IF NOT EXISTS raw_traffic_data (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp TEXT NOT NULL,
+                sensor_id TEXT NOT NULL,
+                latitude REAL NOT NULL,
+                longitude REAL NOT NULL,
+                speed REAL,
+                occupancy REAL,
+                vehicle_count INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS processed_traffic_data (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                segment_id TEXT NOT NULL,
+                timestamp TEXT NOT NULL,
+                congestion_level REAL NOT NULL
+            );
+            COMMIT;
+        ''')
         logger.debug("SQLite DB table creation check finished.")
 
     def _initialize_mongodb(self):
@@ -220,21 +533,52 @@ class DatabaseManager:
             logger.error("MongoDB URI or database name not configured. Skipping MongoDB initialization.")
             return
         try:
-            self.mongo_client = MongoClient(self.mongo_uri, serverSelectionTimeoutMS=5000)
-            self.mongo_client.admin.command('ismaster')
+            # connect=False: the driver connects on first use, so a cold or unreachable server never blocks startup
+            self.mongo_client = MongoClient(self.mongo_uri, serverSelectionTimeoutMS=5000, connect=False)
             self.mongo_db = self.mongo_client[self.mongo_db_name]
-            logger.info(f"Successfully connected to MongoDB server. Database: '{self.mongo_db_name}'")
-            # Example: self.mongo_db[self.raw_traffic_collection_name].create_index([("timestamp", -1)], background=True)
-        except ConnectionFailure as e:
-            logger.error(f"MongoDB connection failed to {self.mongo_uri}: {e}", exc_info=True)
-            self.mongo_client = None; self.mongo_db = None
+            write_concern = WriteConcern(w=0) if self.raw_traffic_write_concern == "w0" else None # None: client default
+            self._raw_traffic_coll = self.mongo_db.get_collection(self.raw_traffic_collection_name, write_concern=write_concern)
+            logger.info(f"MongoDB client created for database '{self.mongo_db_name}'; checking connectivity in the background.")
+            self._start_mongo_probe()
         except MongoConfigurationError as e: # Corrected exception name
             logger.error(f"MongoDB configuration error for {self.mongo_uri}: {e}", exc_info=True)
-            self.mongo_client = None; self.mongo_db = None
+            self.mongo_client = None; self.mongo_db = None; self._raw_traffic_coll = None
         except Exception as e:
             logger.error(f"An unexpected error occurred during MongoDB initialization for {self.mongo_uri}: {e}", exc_info=True)
-            self.mongo_client = None; self.mongo_db = None
+            self.mongo_client = None; self.mongo_db = None; self._raw_traffic_coll = None
+
 
+    def _start_mongo_probe(self):
+        """Run _probe_mongo off the caller's path: as a task on the running event loop if any, else in a daemon thread."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._mongo_probe_thread = threading.Thread(target=self._probe_mongo, name="mongo-probe", daemon=True)
+            self._mongo_probe_thread.start()
+        else:
+            self._mongo_probe_task = loop.create_task(asyncio.to_thread(self._probe_mongo))
+
+    def _probe_mongo(self):
+        """
+        Check MongoDB connectivity and ensure the raw traffic index exists.
+        Failures are only logged; operations surface their own errors.
+        """
+        client = self.mongo_client
+        if client is None:
+            return
+        try:
+            client.admin.command('ping')
+            logger.info(f"Successfully connected to MongoDB server. Database: '{self.mongo_db_name}'")
+            # Serves time-range and per-sensor queries in get_raw_traffic_data_mongo; no-op if it already exists
+            collection = self._raw_traffic_coll
+            collection.create_index([("timestamp", -1), ("sensor_id", 1)], background=True)
+            if self.raw_traffic_ttl_secs:
+                # Lets the server purge old raw traffic; only documents whose timestamp is a BSON date expire
+                collection.create_index("timestamp", expireAfterSeconds=self.raw_traffic_ttl_secs, background=True)
+        except ConnectionFailure as e:
+            logger.error(f"MongoDB connection failed to {self.mongo_uri}: {e}")
+        except Exception as e:
+            logger.error(f"An unexpected error occurred while probing MongoDB at {self.mongo_uri}: {e}", exc_info=True)
 
     db_write_retry_decorator = retry(
         wait=wait_exponential(multiplier=0.2,min=0.2,max=3),
@@ -245,12 +589,9 @@ class DatabaseManager:
     @db_write_retry_decorator
     def save_vehicle_data(self, vd: Dict) -> bool:
         # ... (rest of the method is identical to original in utils.py)
-        sql = '''INSERT OR REPLACE INTO vehicle_tracks (feed_id,track_id,timestamp,class_id,confidence,bbox_x1,bbox_y1,bbox_x2,bbox_y2,center_x,center_y,speed,acceleration,lane,direction,license_plate,ocr_confidence,flags) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)'''
         try:
-            bbox=vd.get('bbox',[None]*4); center=vd.get('center',[None]*2); flags_str=','.join(sorted(list(vd.get('flags',set()))))
-            params=(vd.get('feed_id','unknown'),vd.get('track_id'),vd.get('timestamp',time.time()),vd.get('class_id'),vd.get('confidence'),bbox[0],bbox[1],bbox[2],bbox[3],center[0],center[1],vd.get('speed'),vd.get('acceleration'),vd.get('lane'),vd.get('direction'),vd.get('license_plate'),vd.get('ocr_confidence'),flags_str)
-            with self.lock:
-                with self._get_sqlite_connection() as conn: conn.execute(sql, params)
+            params=_vehicle_track_row(vd)
+            with self._conn() as conn: conn.execute(_INSERT_VEHICLE_TRACK_SQL, params)
             logger.debug(f"Saved track: Feed={params[0]},Track={params[1]},Time={params[2]:.2f}")
             return True
         except RetryError as e: logger.error(f"DB save_vehicle_data failed retries: {e}. TrackID: {vd.get('track_id')}"); return False
@@ -260,21 +601,23 @@ class DatabaseManager:
             return False # Redundant due to raise, but for clarity if raise is removed.
         except Exception as e: logger.error(f"Unexpected error saving vehicle: {e} - TrackID: {vd.get('track_id')}", exc_info=True); raise DatabaseError(f"Unexpected save vehicle: {e}") from e
 
+    # Async variants of the sync writers for use from the event loop. The write runs in a worker thread;
+    # SQLite serialises concurrent writers, and WAL lets readers proceed meanwhile.
+    async def save_vehicle_data_async(self, vd: Dict) -> bool:
+        return await asyncio.to_thread(self.save_vehicle_data, vd)
+
 
     @db_write_retry_decorator
     def save_vehicle_data_batch(self, data_list: List[Dict]) -> bool:
         # ... (rest of the method is identical to original in utils.py)
         if not data_list: return True
-        sql = '''INSERT OR REPLACE INTO vehicle_tracks (feed_id,track_id,timestamp,class_id,confidence,bbox_x1,bbox_y1,bbox_x2,bbox_y2,center_x,center_y,speed,acceleration,lane,direction,license_plate,ocr_confidence,flags) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)'''
-        prepared = []
         try:
-            for vd in data_list:
-                bbox=vd.get('bbox',[None]*4); center=vd.get('center',[None]*2); flags_str=','.join(sorted(list(vd.get('flags',set()))))
-                prepared.append((vd.get('feed_id','unknown'),vd.get('track_id'),vd.get('timestamp',time.time()),vd.get('class_id'),vd.get('confidence'),bbox[0],bbox[1],bbox[2],bbox[3],center[0],center[1],vd.get('speed'),vd.get('acceleration'),vd.get('lane'),vd.get('direction'),vd.get('license_plate'),vd.get('ocr_confidence'),flags_str))
-            if not prepared: return True
-            with self.lock:
-                with self._get_sqlite_connection() as conn: conn.executemany(sql, prepared)
-            logger.debug(f"Saved batch of {len(prepared)} vehicle records.")
+            with self._conn() as conn:
+                # One write transaction (and one WAL commit) for the whole batch; rows are flattened lazily
+                conn.execute("BEGIN IMMEDIATE")
+                conn.executemany(_INSERT_VEHICLE_TRACK_SQL, map(_vehicle_track_row, data_list))
+                conn.execute("COMMIT")
+            logger.debug(f"Saved batch of {len(data_list)} vehicle records.")
             return True
         except RetryError as e: logger.error(f"DB save_vehicle_data_batch failed retries: {e}."); return False
         except sqlite3.Error as e:
@@ -283,43 +626,48 @@ class DatabaseManager:
             return False
         except Exception as e: logger.error(f"Unexpected error saving vehicle batch: {e}", exc_info=True); raise DatabaseError(f"Unexpected save vehicle batch: {e}") from e
 
-    def get_recent_tracks(self, feed_id: Optional[str] = None, limit: int = 100) -> List[Dict]:
+    async def save_vehicle_data_batch_async(self, data_list: List[Dict]) -> bool:
+        return await asyncio.to_thread(self.save_vehicle_data_batch, data_list)
+
+    def get_recent_tracks(self, feed_id: Optional[str] = None, limit: int = 100) -> List[VehicleTrackRow]:
         # ... (rest of the method is identical to original in utils.py)
         try:
-            with self._get_sqlite_connection() as conn:
-                cursor=conn.cursor()
-                if feed_id: cursor.execute("SELECT * FROM vehicle_tracks WHERE feed_id=? ORDER BY timestamp DESC LIMIT ?", (feed_id,limit))
-                else: cursor.execute("SELECT * FROM vehicle_tracks ORDER BY timestamp DESC LIMIT ?", (limit,))
-                return [dict(row) for row in cursor.fetchall()]
+            with self._conn() as conn:
+                cursor=conn.cursor(); cursor.row_factory = _track_row_factory
+                if feed_id: cursor.execute(f"{_SELECT_TRACKS_SQL} WHERE feed_id=? ORDER BY timestamp DESC LIMIT ?", (feed_id,limit))
+                else: cursor.execute(f"{_SELECT_TRACKS_SQL} ORDER BY timestamp DESC LIMIT ?", (limit,))
+                return cursor.fetchall()
         except sqlite3.Error as e: logger.error(f"DB error get recent tracks (feed={feed_id}): {e}", exc_info=True); return []
 
-    def get_track_history(self, feed_id: str, track_id: int, limit: int = 50) -> List[Dict]:
+    def get_track_history(self, feed_id: str, track_id: int, limit: int = 50) -> List[VehicleTrackRow]:
         # ... (rest of the method is identical to original in utils.py)
         try:
-            with self._get_sqlite_connection() as conn:
-                cursor=conn.cursor(); cursor.execute("SELECT * FROM vehicle_tracks WHERE feed_id=? AND track_id=? ORDER BY timestamp DESC LIMIT ?", (feed_id,track_id,limit))
-                return [dict(row) for row in reversed(cursor.fetchall())]
+            with self._conn() as conn:
+                cursor=conn.cursor(); cursor.row_factory = _track_row_factory
+                cursor.execute(f"{_SELECT_TRACKS_SQL} WHERE feed_id=? AND track_id=? ORDER BY timestamp DESC LIMIT ?", (feed_id,track_id,limit))
+                rows = cursor.fetchall(); rows.reverse()
+                return rows
         except sqlite3.Error as e: logger.error(f"DB error get track history (feed={feed_id},track={track_id}): {e}", exc_info=True); return []
 
-    @lru_cache(maxsize=4)
+    @_ttl_cache(ttl=2.0)
     def get_vehicle_stats(self, time_window_secs: int = 300) -> Dict:
         try:
-            with self._get_sqlite_connection() as conn:
+            with self._conn() as conn:
                 cursor=conn.cursor(); min_ts = time.time()-time_window_secs
-                # Use DEFAULT_CONFIG from app.utils.config
-                stopped_threshold = DEFAULT_CONFIG.get('stopped_speed_threshold_kmh', 5)
-                cursor.execute("SELECT COUNT(*) as total_vehicles, AVG(speed) as average_speed_kmh, SUM(CASE WHEN speed < ? THEN 1 ELSE 0 END) as stopped_vehicles FROM vehicle_tracks WHERE timestamp > ?", (stopped_threshold, min_ts))
+                cursor.execute(_STATS_SQL, (self._stopped_threshold_kmh, min_ts))
                 res=cursor.fetchone(); stats=dict(res) if res else {'total_vehicles':0,'average_speed_kmh':0.0,'stopped_vehicles':0}
                 stats['total_vehicles']=stats.get('total_vehicles') or 0; stats['average_speed_kmh']=stats.get('average_speed_kmh') or 0.0; stats['stopped_vehicles']=stats.get('stopped_vehicles') or 0
                 return stats
         except sqlite3.Error as e: logger.error(f"DB error get vehicle stats: {e}", exc_info=True); return {}
 
-    @lru_cache(maxsize=4)
+    @_ttl_cache(ttl=2.0)
     def get_vehicle_counts_by_type(self, time_window_secs: int = 300) -> Dict[str, int]:
         try:
-            with self._get_sqlite_connection() as conn:
+            with self._conn() as conn:
                 cursor=conn.cursor(); min_ts = time.time()-time_window_secs
-                cursor.execute("WITH LT AS (SELECT feed_id,track_id,class_id,MAX(timestamp) as mt FROM vehicle_tracks WHERE timestamp > ? GROUP BY feed_id,track_id) SELECT vt.class_id,COUNT(DISTINCT lt.track_id) as count FROM vehicle_tracks vt JOIN LT ON vt.feed_id=LT.feed_id AND vt.track_id=LT.track_id AND vt.timestamp=LT.mt GROUP BY vt.class_id", (min_ts,))
+                # With a single MAX() aggregate, SQLite takes the bare class_id from the row holding the max timestamp,
+                # so each track's latest class comes out of one grouped index scan without joining back to the table.
+                cursor.execute("SELECT class_id,COUNT(DISTINCT track_id) as count FROM (SELECT track_id,class_id,MAX(timestamp) FROM vehicle_tracks WHERE timestamp > ? GROUP BY feed_id,track_id) GROUP BY class_id", (min_ts,))
                 results=cursor.fetchall()
                 # Use TrafficMonitor from app.utils.monitoring (placeholder for now)
                 type_map=TrafficMonitor.vehicle_type_map
@@ -339,31 +687,13 @@ class DatabaseManager:
     # I will include them for completeness.
 
     def _execute_get_alerts_filtered(self, filters: Dict, limit: int, offset: int) -> List[Dict]:
-        base_q = "SELECT id, timestamp, severity, feed_id, message, details, acknowledged FROM alerts WHERE 1=1"
-        params = []
-        conds = []
-        allowed_exact_match = {"feed_id"}
-        if filters.get("acknowledged") is not None:
-            conds.append(f"acknowledged = ?"); params.append(1 if filters["acknowledged"] else 0)
-        if filters.get("severity"):
-            conds.append(f"severity = ?"); params.append(filters["severity"])
-        if filters.get("severity_in") and isinstance(filters["severity_in"], list) and len(filters["severity_in"]) > 0:
-            placeholders = ", ".join("?" for _ in filters["severity_in"])
-            conds.append(f"severity IN ({placeholders})"); params.extend(filters["severity_in"])
-        for k, v in filters.items():
-            if k in allowed_exact_match and v is not None:
-                conds.append(f"{k} = ?"); params.append(v)
-            elif k == "search" and isinstance(v, str) and v.strip():
-                conds.append("message LIKE ?"); params.append(f"%{v.strip()}%")
-            elif k == "start_time" and isinstance(v, (int, float)):
-                conds.append("timestamp >= ?"); params.append(v)
-            elif k == "end_time" and isinstance(v, (int, float)):
-                conds.append("timestamp <= ?"); params.append(v)
-        if conds: base_q += " AND " + " AND ".join(conds)
-        query = f"{base_q} ORDER BY timestamp DESC LIMIT ? OFFSET ?"; params.extend([limit, offset])
-        with self._get_sqlite_connection() as conn:
-            cursor = conn.cursor(); cursor.execute(query, params)
-            return [dict(row) for row in cursor.fetchall()]
+        where_sql, params = _build_alerts_where(filters)
+        query = f"{_SELECT_ALERTS_SQL} WHERE 1=1{where_sql} ORDER BY timestamp DESC LIMIT ? OFFSET ?"
+        params.extend([limit, offset])
+        with self._conn() as conn:
+            cursor = conn.cursor(); cursor.row_factory = _alert_row_factory
+            cursor.execute(query, params)
+            return cursor.fetchall()
 
     async def get_alerts_filtered(self, filters: Dict, limit: int = 100, offset: int = 0) -> List[Dict]:
         try:
@@ -371,31 +701,51 @@ class DatabaseManager:
         except sqlite3.Error as e: logger.error(f"DB error get_alerts_filtered: {e}", exc_info=True); return []
         except Exception as e: logger.error(f"Unexpected error in get_alerts_filtered via thread: {e}", exc_info=True); return []
 
+    async def stream_alerts_filtered(self, filters: Dict, limit: int = 1000, offset: int = 0, batch_size: int = 256) -> AsyncIterator[Dict]:
+        """
+        Yield up to `limit` filtered alerts, fetched `batch_size` rows at a time, for large exports
+        (e.g. a StreamingResponse). Peak memory is one batch rather than the whole result, and no
+        connection is held between batches.
+        """
+        remaining = limit
+        try:
+            while remaining > 0:
+                size = min(batch_size, remaining)
+                batch = await asyncio.to_thread(self._execute_get_alerts_filtered, filters, size, offset)
+                for alert in batch:
+                    yield alert
+                if len(batch) < size:
+                    return
+                offset += size; remaining -= size
+        except sqlite3.Error as e: logger.error(f"DB error stream_alerts_filtered: {e}", exc_info=True)
+
     def _execute_count_alerts_filtered(self, filters: Dict) -> int:
-        base_q = "SELECT COUNT(*) FROM alerts WHERE 1=1"; params = []; conds = []
-        allowed_exact_match = {"feed_id"}
-        if filters.get("acknowledged") is not None:
-            conds.append(f"acknowledged = ?"); params.append(1 if filters["acknowledged"] else 0)
-        if filters.get("severity"):
-            conds.append(f"severity = ?"); params.append(filters["severity"])
-        if filters.get("severity_in") and isinstance(filters["severity_in"], list) and len(filters["severity_in"]) > 0:
-            placeholders = ", ".join("?" for _ in filters["severity_in"])
-            conds.append(f"severity IN ({placeholders})"); params.extend(filters["severity_in"])
-        for k, v in filters.items():
-            if k in allowed_exact_match and v is not None:
-                conds.append(f"{k} = ?"); params.append(v)
-            elif k == "search" and isinstance(v, str) and v.strip():
-                conds.append("message LIKE ?"); params.append(f"%{v.strip()}%")
-            elif k == "start_time" and isinstance(v, (int, float)):
-                conds.append("timestamp >= ?"); params.append(v)
-            elif k == "end_time" and isinstance(v, (int, float)):
-                conds.append("timestamp <= ?"); params.append(v)
-        if conds: base_q += " AND " + " AND ".join(conds)
-        with self._get_sqlite_connection() as conn:
-            cursor = conn.cursor(); cursor.execute(base_q, params)
+        where_sql, params = _build_alerts_where(filters)
+        with self._conn() as conn:
+            cursor = conn.cursor(); cursor.execute(f"SELECT COUNT(*) FROM alerts WHERE 1=1{where_sql}", params)
             count_result = cursor.fetchone()
             return count_result[0] if count_result else 0
 
+    def _execute_list_and_count_alerts_filtered(self, filters: Dict, limit: int, offset: int) -> Tuple[List[Dict], int]:
+        where_sql, params = _build_alerts_where(filters)
+        query = f"SELECT {', '.join(_ALERT_COLUMNS)}, COUNT(*) OVER () FROM alerts WHERE 1=1{where_sql} ORDER BY timestamp DESC LIMIT ? OFFSET ?"
+        params.extend([limit, offset])
+        with self._conn() as conn:
+            cursor = conn.cursor(); cursor.row_factory = None
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+        if not rows:
+            # The window total rides on returned rows, so a page past the end needs a separate count
+            return [], (self._execute_count_alerts_filtered(filters) if offset else 0)
+        return [dict(zip(_ALERT_COLUMNS, row)) for row in rows], rows[0][-1]
+
+    async def list_and_count_alerts_filtered(self, filters: Dict, limit: int = 100, offset: int = 0) -> Tuple[List[Dict], int]:
+        """Fetch a page of filtered alerts together with the total match count in a single query."""
+        try:
+            return await asyncio.to_thread(self._execute_list_and_count_alerts_filtered, filters, limit, offset)
+        except sqlite3.Error as e: logger.error(f"DB error list_and_count_alerts_filtered: {e}", exc_info=True); return [], 0
+        except Exception as e: logger.error(f"Unexpected error in list_and_count_alerts_filtered via thread: {e}", exc_info=True); return [], 0
+
     async def count_alerts_filtered(self, filters: Dict) -> int:
         try:
             return await asyncio.to_thread(self._execute_count_alerts_filtered, filters)
@@ -405,11 +755,9 @@ class DatabaseManager:
     @db_write_retry_decorator
     def save_alert(self, severity: str, feed_id: str, message: str, details: Optional[str]=None) -> bool:
         if severity not in ('INFO','WARNING','CRITICAL'): logger.error(f"Invalid alert sev: {severity}"); return False
-        sql='INSERT INTO alerts (severity,feed_id,message,details) VALUES (?,?,?,?)'
         try:
             params=(severity,feed_id,message,details)
-            with self.lock:
-                with self._get_sqlite_connection() as conn: conn.execute(sql,params)
+            with self._conn() as conn: conn.execute(_INSERT_ALERT_SQL,params)
             logger.info(f"Saved alert: Sev={severity},Feed={feed_id},Msg='{message[:60]}...'")
             return True
         except RetryError as e: logger.error(f"DB save_alert failed retries: {e}."); return False
@@ -419,6 +767,9 @@ class DatabaseManager:
             return False
         except Exception as e: logger.error(f"Unexpected error saving alert: {e}", exc_info=True); raise DatabaseError(f"Unexpected save alert: {e}") from e
 
+    async def save_alert_async(self, severity: str, feed_id: str, message: str, details: Optional[str]=None) -> bool:
+        return await asyncio.to_thread(self.save_alert, severity, feed_id, message, details)
+
     @retry(wait=wait_exponential(multiplier=0.2,min=0.2,max=3), stop=stop_after_attempt(4), retry=retry_if_exception_type(sqlite3.OperationalError))
     async def acknowledge_alert(self, alert_id: int, acknowledge: bool = True) -> bool:
         try:
@@ -433,11 +784,10 @@ class DatabaseManager:
 
     def _execute_acknowledge_alert(self, alert_id: int, acknowledge: bool) -> bool:
         sql="UPDATE alerts SET acknowledged = ? WHERE id = ?"; ack_val = 1 if acknowledge else 0
-        with self.lock:
-            with self._get_sqlite_connection() as conn:
-                cursor=conn.cursor(); cursor.execute(sql,(ack_val,alert_id)); conn.commit()
-                if cursor.rowcount==0:
-                    logger.warning(f"Alert ID {alert_id} not found for ack."); return False
+        with self._conn() as conn:
+            cursor=conn.cursor(); cursor.execute(sql,(ack_val,alert_id)); conn.commit()
+            if cursor.rowcount==0:
+                logger.warning(f"Alert ID {alert_id} not found for ack."); return False
         logger.info(f"Alert ID {alert_id} ack status set to {acknowledge}.")
         return True
 
@@ -455,13 +805,12 @@ class DatabaseManager:
 
     def _execute_delete_alert(self, alert_id: int) -> bool:
         sql = "DELETE FROM alerts WHERE id = ?"
-        with self.lock:
-            with self._get_sqlite_connection() as conn:
-                cursor = conn.cursor(); cursor.execute(sql, (alert_id,)); conn.commit()
-                if cursor.rowcount > 0:
-                    logger.info(f"Alert ID {alert_id} deleted successfully."); return True
-                else:
-                    logger.warning(f"Alert ID {alert_id} not found for deletion."); return False
+        with self._conn() as conn:
+            cursor = conn.cursor(); cursor.execute(sql, (alert_id,)); conn.commit()
+            if cursor.rowcount > 0:
+                logger.info(f"Alert ID {alert_id} deleted successfully."); return True
+            else:
+                logger.warning(f"Alert ID {alert_id} not found for deletion."); return False
 
     async def get_alert_by_id(self, alert_id: int) -> Optional[Dict]:
         try:
@@ -473,15 +822,22 @@ class DatabaseManager:
 
     def _execute_get_alert_by_id(self, alert_id: int) -> Optional[Dict]:
         sql = "SELECT id, timestamp, severity, feed_id, message, details, acknowledged FROM alerts WHERE id = ?"
-        with self._get_sqlite_connection() as conn:
+        with self._conn() as conn:
             cursor = conn.cursor(); cursor.execute(sql, (alert_id,))
             row = cursor.fetchone()
             if row: return dict(row)
             else: logger.info(f"Alert ID {alert_id} not found."); return None
 
-    @retry(wait=wait_exponential(multiplier=0.2,min=0.2,max=3), stop=stop_after_attempt(3), retry=retry_if_exception_type(Exception))
     def save_raw_traffic_data_mongo(self, data: Dict) -> bool:
-        if not self.mongo_db:
+        """
+        Buffer a raw traffic document; the buffer is written with one unordered insert_many once it holds
+        `mongo_batch_size` documents or its oldest document is `mongo_flush_interval_secs` old. A background
+        thread enforces the interval on quiet feeds, and close() writes whatever is left.
+        A batch that cannot be written (MongoDB unreachable after retries) goes back into the buffer for the
+        next flush. Returns True once the document is buffered, whether or not a flush it triggered succeeded;
+        that outcome is logged, and flush_raw_traffic_data_mongo reports it to callers that need to know.
+        """
+        if self.mongo_db is None:
             # Fallback or error if MongoDB not initialized.
             # This behavior might need adjustment based on requirements.
             # For instance, if SQLite is a mandatory fallback:
@@ -489,65 +845,244 @@ class DatabaseManager:
             # return self.save_raw_traffic_data_sqlite(data) # Requires such a method
             raise DatabaseError("MongoDB not available for saving traffic data.")
 
+        self._start_traffic_flusher()
+        now = time.monotonic()
+        with self._pending_traffic_lock:
+            if not self._pending_traffic:
+                self._pending_traffic_since = now
+            self._pending_traffic.append(_prepare_traffic_doc(data))
+            if len(self._pending_traffic) < self.mongo_batch_size and now - self._pending_traffic_since < self.mongo_flush_interval_secs:
+                return True
+            if now < self._traffic_retry_at:
+                return True
+            batch, self._pending_traffic = self._pending_traffic, []
+        # Written outside the lock so other producers keep buffering meanwhile; retries live in the batch method
+        self._write_traffic_batch(batch)
+        return True
+
+    def flush_raw_traffic_data_mongo(self) -> bool:
+        """Write any buffered raw traffic documents now. False if they could not all be written."""
+        with self._pending_traffic_lock:
+            batch, self._pending_traffic = self._pending_traffic, []
+        return self._write_traffic_batch(batch)
+
+    def _write_traffic_batch(self, batch: List[Tuple[Dict, bool]]) -> bool:
+        """
+        Write a batch taken from the buffer. If MongoDB is unavailable or still failing transiently after the
+        retries, the batch goes back to the front of the buffer; any other error (e.g. a document bson cannot
+        encode) would fail the same way on every flush, so that batch is logged and dropped instead.
+        """
+        if not batch: return True
+        if self.mongo_db is None:
+            self._requeue_traffic(batch)
+            logger.error(f"MongoDB not available; kept {len(batch)} raw traffic documents buffered for the next flush.")
+            return False
         try:
-            collection = self.mongo_db[self.raw_traffic_collection_name]
-            result = collection.insert_one(data)
-            logger.debug(f"Saved raw traffic data to MongoDB with id: {result.inserted_id}")
+            return self._insert_raw_traffic([doc for doc, _ in batch], {i for i, (_, generated) in enumerate(batch) if generated})
+        except RetryError as e:
+            self._requeue_traffic(batch)
+            logger.error(f"Could not write {len(batch)} raw traffic documents to MongoDB; kept them buffered for the next flush: {e.last_attempt.exception()}")
+            return False
+        except DatabaseError as e:
+            logger.error(f"Dropped {len(batch)} raw traffic documents after a non-retryable MongoDB error: {e}")
+            logger.debug(f"Dropped raw traffic documents: {[doc for doc, _ in batch]}")
+            return False
+
+    def _requeue_traffic(self, batch: List[Tuple[Dict, bool]]) -> None:
+        with self._pending_traffic_lock:
+            if not self._pending_traffic:
+                self._pending_traffic_since = time.monotonic()
+            self._pending_traffic[:0] = batch # Ahead of anything buffered meanwhile, keeping arrival order
+            # Don't make every following save wait out another round of retries; the flusher tries again
+            self._traffic_retry_at = time.monotonic() + self.mongo_flush_interval_secs
+            overflow = len(self._pending_traffic) - self.mongo_max_pending
+            if overflow > 0:
+                del self._pending_traffic[:overflow]
+                logger.error(f"Raw traffic buffer over {self.mongo_max_pending} documents; dropped the {overflow} oldest.")
+
+    def _start_traffic_flusher(self) -> None:
+        if self._traffic_flusher is not None:
+            return
+        with self._pending_traffic_lock:
+            if self._traffic_flusher is None and not self._traffic_flusher_stop.is_set():
+                self._traffic_flusher = threading.Thread(target=self._run_traffic_flusher, name="mongo-traffic-flush", daemon=True)
+                self._traffic_flusher.start()
+
+    def _run_traffic_flusher(self) -> None:
+        """Flush the raw traffic buffer once its oldest document reaches the flush interval, even if no further saves arrive."""
+        interval = self.mongo_flush_interval_secs
+        while not self._traffic_flusher_stop.wait(max(interval / 2, 0.05)):
+            with self._pending_traffic_lock:
+                due = bool(self._pending_traffic) and time.monotonic() - self._pending_traffic_since >= interval
+            if due and self.mongo_db is not None:
+                try:
+                    self.flush_raw_traffic_data_mongo()
+                except Exception as e:
+                    logger.error(f"Background flush of raw traffic data failed: {e}", exc_info=True)
+
+    def _stop_traffic_flusher(self) -> None:
+        self._traffic_flusher_stop.set()
+        flusher, self._traffic_flusher = self._traffic_flusher, None
+        if flusher is not None and flusher is not threading.current_thread():
+            flusher.join(timeout=5)
+
+    def save_raw_traffic_data_mongo_batch(self, docs: List[Dict]) -> bool:
+        """
+        Insert many raw traffic documents in one unordered bulk write. Unordered lets the server keep going past
+        individual failures (e.g. duplicate keys); those are logged and reported by returning False.
+        Transient errors are retried; once retries run out tenacity's RetryError propagates.
+        With raw_traffic_write_concern "w0" the insert is fire-and-forget and server-side failures go unreported.
+        The caller's dicts are never modified.
+        """
+        if not docs: return True
+        if self.mongo_db is None:
+            raise DatabaseError("MongoDB not available for saving traffic data.")
+        prepared = [_prepare_traffic_doc(doc) for doc in docs]
+        return self._insert_raw_traffic([doc for doc, _ in prepared], {i for i, (_, generated) in enumerate(prepared) if generated})
+
+    @retry(wait=wait_exponential(multiplier=0.2,min=0.2,max=3), stop=stop_after_attempt(3), retry=retry_if_exception_type(_MONGO_TRANSIENT_ERRORS))
+    def _insert_raw_traffic(self, docs: List[Dict], generated: set) -> bool:
+        """
+        insert_many with retries. Every attempt sends the same _ids, so after a partially applied attempt the
+        documents that already made it in come back as duplicate-key errors; for ids we generated (the indices in
+        `generated`) that can only mean an earlier attempt wrote them, so those errors count as success.
+        """
+        try:
+            acknowledged = self._raw_traffic_coll.write_concern.acknowledged
+            # PyMongo refuses bypass_document_validation on unacknowledged writes
+            result = self._raw_traffic_coll.insert_many(
+                docs, ordered=False, bypass_document_validation=acknowledged
+            )
+            self._clear_mongo_query_cache()
+            logger.debug(f"Saved batch of {len(result.inserted_ids)} raw traffic documents to MongoDB.")
             return True
-        except Exception as e: # Includes pymongo.errors.PyMongoError
-            logger.error(f"Failed to save raw traffic data to MongoDB: {e}", exc_info=True)
-            raise DatabaseError(f"Failed to save to MongoDB: {e}") from e
+        except BulkWriteError as e:
+            self._clear_mongo_query_cache() # Unordered: the documents that did not fail were still inserted
+            write_errors = [
+                err for err in e.details.get("writeErrors", [])
+                if not (err.get("code") == _MONGO_DUPLICATE_KEY and err.get("index") in generated)
+            ]
+            if not write_errors:
+                logger.debug(f"Raw traffic batch of {len(docs)} completed on retry; duplicate ids were already written.")
+                return True
+            logger.error(f"{len(write_errors)} of {len(docs)} raw traffic documents failed to save to MongoDB; first error: {write_errors[0].get('errmsg')}")
+            return False
+        except _MONGO_TRANSIENT_ERRORS as e:
+            logger.warning(f"Transient MongoDB error saving raw traffic batch, will retry: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Failed to save raw traffic batch to MongoDB: {e}", exc_info=True)
+            raise DatabaseError(f"Failed to save batch to MongoDB: {e}") from e
+
+    def _clear_mongo_query_cache(self) -> None:
+        with self._mongo_query_cache_lock:
+            self._mongo_query_cache.clear()
 
+    def _find_raw_traffic(self, query: Dict, limit: int, sort_criteria: Optional[List[Tuple[str, int]]],
+                          projection: Optional[Dict[str, Any]]):
+        cursor = self._raw_traffic_coll.find(query, projection=projection).limit(limit)
+        if sort_criteria:
+            cursor = cursor.sort(sort_criteria)
+        return cursor
 
-    def get_raw_traffic_data_mongo(self, query: Dict, limit: int = 1000, sort_criteria: Optional[List[Tuple[str, int]]] = None) -> List[Dict]:
-        if not self.mongo_db:
+    def get_raw_traffic_data_mongo(self, query: Dict, limit: int = 1000, sort_criteria: Optional[List[Tuple[str, int]]] = None,
+                                   projection: Optional[Dict[str, Any]] = None) -> List[Dict]:
+        """
+        Find raw traffic documents, optionally returning only the fields in `projection` (fewer bytes to
+        transfer and decode). Identical queries within `mongo_query_cache_ttl` seconds are served from an
+        in-process cache (cleared on every insert); callers get a shallow copy of the cached list.
+        """
+        if self.mongo_db is None:
             logger.warning("MongoDB not initialized. Cannot get raw_traffic_data.")
             return [] # Or raise DatabaseError, depending on desired strictness
+        # JSON rather than a hashable tuple so ObjectIds, datetimes and nested operators can be part of the key
+        key = json.dumps([query, limit, sort_criteria, projection], sort_keys=True, default=str)
+        now = time.monotonic()
+        with self._mongo_query_cache_lock:
+            cached = self._mongo_query_cache.get(key)
+        if cached is not None and cached[0] > now:
+            return copy.copy(cached[1])
         try:
-            collection = self.mongo_db[self.raw_traffic_collection_name]
-            cursor = collection.find(query).limit(limit)
-            if sort_criteria:
-                cursor = cursor.sort(sort_criteria)
-            return list(cursor)
+            docs = list(self._find_raw_traffic(query, limit, sort_criteria, projection))
         except Exception as e: # Includes pymongo.errors.PyMongoError
             logger.error(f"Failed to retrieve raw_traffic_data from MongoDB: {e}", exc_info=True)
             return []
+        if self.mongo_query_cache_ttl > 0:
+            with self._mongo_query_cache_lock:
+                cache = self._mongo_query_cache
+                if len(cache) >= _MONGO_QUERY_CACHE_MAXSIZE and key not in cache:
+                    for stale in [k for k, (expires_at, _) in cache.items() if expires_at <= now]:
+                        del cache[stale]
+                    if len(cache) >= _MONGO_QUERY_CACHE_MAXSIZE:
+                        del cache[next(iter(cache))] # Oldest insertion
+                cache[key] = (now + self.mongo_query_cache_ttl, docs)
+        return copy.copy(docs)
+
+    def iter_raw_traffic_data_mongo(self, query: Dict, limit: int = 1000, sort_criteria: Optional[List[Tuple[str, int]]] = None,
+                                    projection: Optional[Dict[str, Any]] = None, batch_size: int = 256) -> Iterator[Dict]:
+        """
+        Stream raw traffic documents, fetching `batch_size` per round trip instead of materialising the whole
+        result like get_raw_traffic_data_mongo. Bypasses the query cache; errors propagate to the consumer.
+        """
+        if self.mongo_db is None:
+            raise DatabaseError("MongoDB not available for reading traffic data.")
+        yield from self._find_raw_traffic(query, limit, sort_criteria, projection).batch_size(batch_size)
+
+    async def close_async(self):
+        """
+        Dispose the async SQLAlchemy engine on the running loop, which owns its pooled connections,
+        after letting a still-running Mongo probe task finish so close() never pulls the client out from under it.
+        """
+        task, self._mongo_probe_task = self._mongo_probe_task, None
+        if task is not None and not task.done():
+            # The probe runs in a worker thread and cannot be interrupted; bound the wait instead
+            _, pending = await asyncio.wait({task}, timeout=5)
+            if pending:
+                logger.warning("MongoDB probe still running at shutdown; closing anyway.")
+        if self.async_engine is not None:
+            engine, self.async_engine, self.async_session_factory = self.async_engine, None, None
+            try:
+                await engine.dispose()
+                logger.info("Disposed async SQLAlchemy engine.")
+            except Exception as e:
+                logger.error(f"Error disposing async SQLAlchemy engine: {e}", exc_info=True)
 
     def close(self):
         logger.info("DatabaseManager close called.")
-        # Async engine disposal (if initialized)
-        # Note: dispose() is an async operation, ideally called from an async context.
-        # If close() must be sync, this might need `asyncio.run()` or be handled at app shutdown.
-        # For now, assuming it's called from a place where blocking for a short while is OK.
-        if self._async_engine:
+        # Async engine disposal, if close_async() did not already do it. dispose() is a coroutine; running it on
+        # a private loop thread means this works from plain threads and from inside a running loop alike.
+        if self.async_engine is not None:
+            engine, self.async_engine, self.async_session_factory = self.async_engine, None, None
             try:
-                # Running dispose in a new event loop if called from a synchronous context
-                async def _dispose_engine():
-                    await self._async_engine.dispose()
-
-                try:
-                    loop = asyncio.get_running_loop()
-                    if loop.is_running(): # If called from within an existing event loop
-                        # Schedule it and hope it runs, or use a more sophisticated sync mechanism
-                        asyncio.create_task(_dispose_engine())
-                        logger.info("Scheduled async SQLAlchemy engine disposal.")
-                    else: # If no loop is running, create one
-                        raise RuntimeError("No running event loop")
-                except RuntimeError: # No running event loop or other asyncio issue
-                     asyncio.run(_dispose_engine())
-                     logger.info("Disposed async SQLAlchemy engine via asyncio.run().")
-
+                _run_coroutine_in_thread(engine.dispose(), timeout=5)
+                logger.info("Disposed async SQLAlchemy engine.")
             except Exception as e:
                 logger.error(f"Error disposing async SQLAlchemy engine: {e}", exc_info=True)
-            finally:
-                self._async_engine = None
-                self._async_session_factory = None
 
-        # Synchronous SQLite connections are typically managed per-call using 'with', so no global pool to close here by default.
-        # If a persistent synchronous SQLAlchemy engine (for self.get_session_sync) were stored on self, it would be disposed here.
+        # Close idle pooled SQLite connections
+        self._close_sqlite_pool()
+        # Dispose the sync SQLAlchemy engine used by get_session_sync
+        if self._sync_engine:
+            try:
+                self._sync_engine.dispose()
+                logger.info("Disposed sync SQLAlchemy engine.")
+            except Exception as e:
+                logger.error(f"Error disposing sync SQLAlchemy engine: {e}", exc_info=True)
+            finally:
+                self._sync_engine = None
+                self._sync_session_factory = None
 
-        # Close MongoDB client (if initialized)
+        # Close MongoDB client (if initialized), writing out buffered raw traffic first
+        self._stop_traffic_flusher()
+        probe_thread, self._mongo_probe_thread = self._mongo_probe_thread, None
+        if probe_thread is not None and probe_thread.is_alive():
+            probe_thread.join(timeout=5)
         if self.mongo_client:
+            try:
+                if self._pending_traffic and self.mongo_db is not None:
+                    self.flush_raw_traffic_data_mongo()
+            except Exception as e:
+                logger.error(f"Error flushing buffered raw traffic data to MongoDB: {e}", exc_info=True)
             try:
                 self.mongo_client.close()
                 logger.info("MongoDB client connection closed.")
@@ -556,6 +1091,7 @@ class DatabaseManager:
             finally:
                 self.mongo_client = None
                 self.mongo_db = None
+                self._raw_traffic_coll = None
         else:
             logger.info("MongoDB client was not initialized or already closed.")
 
@@ -1,17 +1,91 @@
+import asyncio
 import cv2
+import hashlib
 import numpy as np
 import logging
-import io
+import re
+import threading
 import time
-from typing import Dict, Optional, Any # Ensure Any is imported if used, though not directly in LPP
-from PIL import Image
-import pytesseract
-import google.generativeai as genai
+from collections import OrderedDict
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Optional, Any, Sequence, Tuple # Ensure Any is imported if used, though not directly in LPP
 from google.api_core import exceptions as google_api_exceptions
 from tenacity import retry, wait_exponential, stop_after_attempt, retry_if_exception_type, RetryError
 
 logger = logging.getLogger(__name__)
 
+
+# The OCR backends pull in large dependency trees (grpc/protobuf, PIL); import them on first use so processes
+# that never OCR, or never use Gemini, don't pay for them at startup.
+@lru_cache(maxsize=None)
+def _get_genai():
+    import google.generativeai as genai
+    return genai
+
+
+@lru_cache(maxsize=None)
+def _get_pytesseract():
+    """The pytesseract module, or None if it is not installed."""
+    try:
+        import pytesseract
+    except ImportError:
+        return None
+    return pytesseract
+
+
+def _gemini_safety_errors() -> tuple:
+    genai = _get_genai()
+    return (genai.types.BlockedPromptException, genai.types.StopCandidateException)
+
+
+_GEMINI_OCR_PROMPT = (
+    "Identify and extract the license plate number from this image. Provide only the license plate characters (alphanumeric). "
+    "Do not include any additional text, labels, or explanations. If multiple plates are visible, focus on the largest and clearest one. "
+    "If no license plate is clearly visible or readable, respond with an empty string."
+)
+# Errors worth retrying / cooling down on rather than treating the ROI as unreadable
+_GEMINI_RETRYABLE_ERRORS = (
+    google_api_exceptions.PermissionDenied,
+    google_api_exceptions.ResourceExhausted,
+    google_api_exceptions.DeadlineExceeded,
+    google_api_exceptions.InternalServerError,
+    google_api_exceptions.ServiceUnavailable,
+    google_api_exceptions.Aborted,
+    google_api_exceptions.Unknown,
+    ConnectionError,
+    TimeoutError,
+    # Not retrying on genai.types.BlockedPromptException or genai.types.StopCandidateException
+)
+# Standard Tesseract config for license plates
+_TESSERACT_PLATE_CONFIG = r'--oem 3 --psm 7 -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'
+# Deletes every non-alphanumeric ASCII character in one C-level str.translate pass
+_ASCII_NON_ALNUM_TABLE = str.maketrans('', '', ''.join(c for c in map(chr, range(128)) if not c.isalnum()))
+# In str patterns \w is exactly str.isalnum() plus '_', so this strips what the isalnum filter used to, Unicode included
+_NON_ALNUM = re.compile(r'[\W_]+')
+
+
+def _clean_plate_text(text: str) -> str:
+    """Keep only alphanumeric characters, uppercased."""
+    if text.isascii():
+        return text.translate(_ASCII_NON_ALNUM_TABLE).upper()
+    return _NON_ALNUM.sub('', text).upper() # Rare non-ASCII reply
+
+
+def _limit_width(roi: np.ndarray, max_width: int) -> np.ndarray:
+    """Downscale `roi` (keeping aspect ratio) so it is at most `max_width` px wide; 0 means no limit."""
+    width = roi.shape[1]
+    if max_width <= 0 or width <= max_width:
+        return roi
+    scale = max_width / width
+    return cv2.resize(roi, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+
+def _roi_digest(roi: np.ndarray) -> Tuple[Tuple[int, ...], str, bytes]:
+    """Exact identity of an ROI: shape, dtype and a digest of every pixel. Only byte-identical crops share it."""
+    return roi.shape, roi.dtype.str, hashlib.blake2b(np.ascontiguousarray(roi).data, digest_size=16).digest()
+
+
 class LicensePlatePreprocessor:
     def __init__(self, config: Dict, perspective_matrix: Optional[np.ndarray] = None): # perspective_matrix not used in current impl
         self.config = config.get("ocr_engine", {})
@@ -19,6 +93,7 @@ class LicensePlatePreprocessor:
         self.model = None
         if self.gemini_api_key:
             try:
+                genai = _get_genai()
                 genai.configure(api_key=self.gemini_api_key)
                 self.model = genai.GenerativeModel('gemini-pro-vision')
                 logger.info("Gemini Pro Vision model initialized for OCR.")
@@ -35,21 +110,81 @@ class LicensePlatePreprocessor:
         self.morph_kernel = np.array(self.config.get("morph_kernel", [[1,1,1],[1,1,1],[1,1,1]]), dtype=np.uint8)
         self.sharpen_kernel = np.array(self.config.get("sharpen_kernel", [[-1,-1,-1],[-1,9,-1],[-1,-1,-1]]), dtype=np.float32)
 
+        # Input-independent OCR settings, built once instead of on every frame
+        self._gemini_prompt = _GEMINI_OCR_PROMPT
+        self._tess_config = _TESSERACT_PLATE_CONFIG
+
+        # Recent plate reads keyed by the exact ROI pixels, so a crop repeated unchanged (e.g. a static frame or a
+        # re-submitted detection) skips OCR. Entries expire after ocr_cache_ttl_secs; LRU, ocr_cache_size entries
+        # (0 disables); only non-empty reads are cached.
+        self.ocr_cache_size = int(self.config.get("ocr_cache_size", 256))
+        self.ocr_cache_ttl_secs = float(self.config.get("ocr_cache_ttl_secs", 2.0))
+        self._ocr_cache: "OrderedDict[Tuple, Tuple[float, str]]" = OrderedDict() # key -> (expires_at, text)
+        self._ocr_cache_lock = threading.Lock()
+
+        # Opt-in: with both engines available, run Tesseract speculatively while the Gemini request is in flight, so
+        # a Gemini miss costs max(gemini, tesseract) instead of their sum. Gemini's answer still takes precedence, but
+        # a Tesseract run that already started is wasted CPU, so this only pays off when Gemini misses often.
+        # Call close() to release the worker threads.
+        self.parallel_tesseract = bool(self.config.get("parallel_tesseract", False))
+        self._tesseract_executor: Optional[ThreadPoolExecutor] = None
+        if self.parallel_tesseract and self.model:
+            self._tesseract_executor = ThreadPoolExecutor(
+                max_workers=int(self.config.get("tesseract_workers", 2)), thread_name_prefix="tesseract-ocr"
+            )
+
+        # Plate text gains nothing from wider crops; larger ones only cost encode/upload time and Tesseract CPU
+        self.gemini_max_roi_width = int(self.config.get("gemini_max_roi_width", 400))
+        self.tesseract_max_roi_width = int(self.config.get("tesseract_max_roi_width", 200))
+
+        # Gemini upload format: grayscale at quality 75 by default; set gemini_send_grayscale: false to send colour again
+        self.gemini_send_grayscale = bool(self.config.get("gemini_send_grayscale", True))
+        jpeg_quality = int(self.config.get("gemini_jpeg_quality", 75 if self.gemini_send_grayscale else 90))
+        self._gemini_jpeg_params = [int(cv2.IMWRITE_JPEG_QUALITY), jpeg_quality, int(cv2.IMWRITE_JPEG_OPTIMIZE), 1]
+
+        # Run Tesseract preprocessing through OpenCV's Transparent API (cv2.UMat -> OpenCL) when asked for and available
+        self.use_opencl = bool(self.config.get("use_opencl", False)) and cv2.ocl.haveOpenCL()
+        if self.use_opencl:
+            cv2.ocl.setUseOpenCL(True)
+            logger.info("OpenCL available; Tesseract preprocessing will use cv2.UMat.")
+
+    def close(self) -> None:
+        """Shut down the speculative Tesseract workers without waiting; queued runs are cancelled. Idempotent."""
+        executor, self._tesseract_executor = self._tesseract_executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def __del__(self):
+        # getattr: __init__ may have failed before the executor attribute was set
+        if getattr(self, "_tesseract_executor", None) is not None:
+            self.close()
+
+    def _encode_gemini_image(self, image_roi: np.ndarray) -> Optional[Dict[str, Any]]:
+        """JPEG-encode an ROI as a Gemini image part; None if encoding fails."""
+        image_roi = _limit_width(image_roi, self.gemini_max_roi_width)
+        if self.gemini_send_grayscale and image_roi.ndim == 3:
+            # Plate text needs no colour: a single-channel JPEG is roughly half the upload
+            image_roi = cv2.cvtColor(image_roi, cv2.COLOR_BGR2GRAY)
+        # Encode the BGR/gray ROI directly; libjpeg handles the channel order, so no RGB copy or PIL round-trip
+        ok, encoded = cv2.imencode('.jpg', image_roi, self._gemini_jpeg_params)
+        if not ok:
+            logger.warning(f"Failed to JPEG-encode ROI of shape {image_roi.shape} for Gemini OCR.")
+            return None
+        return {"mime_type": "image/jpeg", "data": encoded.tobytes()}
+
+    @staticmethod
+    def _gemini_response_text(response: Any) -> str:
+        ocr_text = ""
+        if response and hasattr(response, 'text') and response.text:
+            ocr_text = response.text.strip()
+        elif response and response.candidates and response.candidates[0].content and response.candidates[0].content.parts:
+            ocr_text = response.candidates[0].content.parts[0].text.strip()
+        return ocr_text
+
     @retry(
         wait=wait_exponential(multiplier=1, min=2, max=10),
         stop=stop_after_attempt(3), # Matches the value from original config, adjustable
-        retry=retry_if_exception_type((
-            google_api_exceptions.PermissionDenied,
-            google_api_exceptions.ResourceExhausted,
-            google_api_exceptions.DeadlineExceeded,
-            google_api_exceptions.InternalServerError,
-            google_api_exceptions.ServiceUnavailable,
-            google_api_exceptions.Aborted,
-            google_api_exceptions.Unknown,
-            ConnectionError,
-            TimeoutError
-            # Not retrying on genai.types.BlockedPromptException or genai.types.StopCandidateException
-        ))
+        retry=retry_if_exception_type(_GEMINI_RETRYABLE_ERRORS)
     )
     def _call_gemini_ocr(self, image_roi: np.ndarray) -> str:
         if not self.model:
@@ -63,29 +198,18 @@ class LicensePlatePreprocessor:
 
         logger.debug(f"Attempting Gemini OCR call for ROI of shape {image_roi.shape}")
         try:
-            pil_image = Image.fromarray(cv2.cvtColor(image_roi, cv2.COLOR_BGR2RGB))
-            img_byte_arr = io.BytesIO()
-            pil_image.save(img_byte_arr, format='JPEG', quality=90) # Good quality JPEG
-            img_bytes = img_byte_arr.getvalue()
-
-            image_part = {"mime_type": "image/jpeg", "data": img_bytes}
-            # Updated prompt based on common best practices for Gemini Vision for this task
-            prompt_parts = [
-                image_part,
-                "Identify and extract the license plate number from this image. Provide only the license plate characters (alphanumeric). Do not include any additional text, labels, or explanations. If multiple plates are visible, focus on the largest and clearest one. If no license plate is clearly visible or readable, respond with an empty string.",
-            ]
+            image_part = self._encode_gemini_image(image_roi)
+            if image_part is None:
+                return ""
+            # Prompt based on common best practices for Gemini Vision for this task
+            prompt_parts = [image_part, self._gemini_prompt]
 
             # Assuming generate_content is the correct method for gemini-pro-vision
             response = self.model.generate_content(prompt_parts)
-
-            ocr_text = ""
-            if response and hasattr(response, 'text') and response.text:
-                ocr_text = response.text.strip()
-            elif response and response.candidates and response.candidates[0].content and response.candidates[0].content.parts:
-                ocr_text = response.candidates[0].content.parts[0].text.strip()
+            ocr_text = self._gemini_response_text(response)
 
             # Post-process to keep only alphanumeric, uppercase
-            ocr_text = ''.join(filter(str.isalnum, ocr_text)).upper()
+            ocr_text = _clean_plate_text(ocr_text)
 
             if ocr_text:
                 logger.info(f"Gemini OCR Result: '{ocr_text}'")
@@ -95,19 +219,11 @@ class LicensePlatePreprocessor:
             self.last_api_error_time = 0 # Reset cool-down on success
             return ocr_text
 
-        except (genai.types.BlockedPromptException, genai.types.StopCandidateException) as safety_error:
+        except _gemini_safety_errors() as safety_error:
             logger.warning(f"Gemini content safety issue: {safety_error}")
             self.last_api_error_time = time.monotonic() # Start cool-down
             return "" # Not retryable by Tenacity for this type of error
-        except (google_api_exceptions.PermissionDenied,
-                google_api_exceptions.ResourceExhausted,
-                google_api_exceptions.DeadlineExceeded,
-                google_api_exceptions.InternalServerError,
-                google_api_exceptions.ServiceUnavailable,
-                google_api_exceptions.Aborted,
-                google_api_exceptions.Unknown,
-                ConnectionError,
-                TimeoutError) as retryable_error:
+        except _GEMINI_RETRYABLE_ERRORS as retryable_error:
             logger.warning(f"Gemini API/network error (will be retried by tenacity): {type(retryable_error).__name__} - {retryable_error}")
             self.last_api_error_time = time.monotonic() # Start cool-down after retries eventually fail
             raise # Re-raise for tenacity to handle retries
@@ -116,15 +232,64 @@ class LicensePlatePreprocessor:
             self.last_api_error_time = time.monotonic() # Start cool-down
             return ""
 
+    async def _call_gemini_ocr_batch(self, rois: Sequence[np.ndarray]) -> List[str]:
+        """
+        OCR several ROIs with concurrent Gemini requests, so a frame with N plates costs about one round trip.
+        Returns one (possibly empty) result per ROI. Unlike _call_gemini_ocr there are no per-ROI retries;
+        a retryable error starts the cool-down and callers fall back to Tesseract.
+        """
+        if not self.model:
+            logger.warning("Gemini model not available for _call_gemini_ocr_batch.")
+            return [""] * len(rois)
+
+        current_time = time.monotonic()
+        if current_time - self.last_api_error_time < self.cool_down_secs:
+            logger.info(f"Gemini API cool-down period active. Skipping OCR of {len(rois)} ROIs. Wait {self.cool_down_secs - (current_time - self.last_api_error_time):.1f}s.")
+            return [""] * len(rois)
+
+        # JPEG encoding is CPU work; keep it off the event loop
+        image_parts = await asyncio.gather(*(asyncio.to_thread(self._encode_gemini_image, roi) for roi in rois))
+        pending = [i for i, part in enumerate(image_parts) if part is not None]
+        responses = await asyncio.gather(
+            *(self.model.generate_content_async([image_parts[i], self._gemini_prompt]) for i in pending),
+            return_exceptions=True
+        )
+
+        results = [""] * len(rois)
+        for i, response in zip(pending, responses):
+            if isinstance(response, _gemini_safety_errors()):
+                logger.warning(f"Gemini content safety issue: {response}")
+                self.last_api_error_time = time.monotonic() # Start cool-down
+            elif isinstance(response, _GEMINI_RETRYABLE_ERRORS):
+                logger.warning(f"Gemini API/network error in batch OCR: {type(response).__name__} - {response}")
+                self.last_api_error_time = time.monotonic() # Start cool-down
+            elif isinstance(response, BaseException):
+                logger.error(f"Unexpected error during Gemini batch OCR call: {response}", exc_info=response)
+                self.last_api_error_time = time.monotonic() # Start cool-down
+            else:
+                results[i] = _clean_plate_text(self._gemini_response_text(response))
+        if any(results):
+            logger.info(f"Gemini batch OCR results: {results}")
+        if all(not isinstance(response, BaseException) for response in responses):
+            self.last_api_error_time = 0 # Reset cool-down when the whole batch succeeded
+        return results
+
     def _preprocess_for_tesseract(self, roi: np.ndarray) -> Optional[np.ndarray]:
-        if roi is None or roi.size == 0 or roi.shape[0] < 10 or roi.shape[1] < 10: # Basic check
-            logger.debug("ROI too small or empty for Tesseract preprocessing.")
+        if roi is None or roi.size == 0:
+            logger.debug("Empty ROI for Tesseract preprocessing.")
+            return None
+        # Cap the width first so the size check applies to the image Tesseract actually gets
+        roi = _limit_width(roi, self.tesseract_max_roi_width)
+        if roi.shape[0] < 10 or roi.shape[1] < 10: # Basic check
+            logger.debug("ROI too small for Tesseract preprocessing.")
             return None
         try:
+            # With a UMat input the same calls below execute as OpenCL kernels and stay on the device until .get()
+            src = cv2.UMat(roi) if self.use_opencl else roi
             if len(roi.shape) == 3:
-                gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
+                gray = cv2.cvtColor(src, cv2.COLOR_BGR2GRAY)
             else:
-                gray = roi.copy() # Assume already grayscale if not 3 channels
+                gray = src # Assume already grayscale if not 3 channels; GaussianBlur does not modify its input
 
             # Noise reduction - GaussianBlur is common
             blurred = cv2.GaussianBlur(gray, (3, 3), 0)
@@ -140,21 +305,64 @@ class LicensePlatePreprocessor:
             # opened = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, kernel, iterations=1)
             # closed = cv2.morphologyEx(opened, cv2.MORPH_CLOSE, kernel, iterations=1)
             # For Tesseract, sometimes simpler is better. Start with just threshold.
-            processed_roi = thresh
+            processed_roi = thresh.get() if isinstance(thresh, cv2.UMat) else thresh
 
             return processed_roi
         except Exception as e:
             logger.error(f"Error in _preprocess_for_tesseract: {e}", exc_info=True)
             return None
 
+    def _ocr_cache_key(self, roi: np.ndarray) -> Optional[Tuple]:
+        return _roi_digest(roi) if self.ocr_cache_size > 0 and self.ocr_cache_ttl_secs > 0 else None
+
+    def _ocr_cache_get(self, key: Optional[Tuple]) -> Optional[str]:
+        if key is None:
+            return None
+        with self._ocr_cache_lock:
+            entry = self._ocr_cache.get(key)
+            if entry is None:
+                return None
+            expires_at, text = entry
+            if time.monotonic() >= expires_at:
+                del self._ocr_cache[key]
+                return None
+            self._ocr_cache.move_to_end(key)
+        return text
+
+    def _ocr_cache_put(self, key: Optional[Tuple], text: str) -> None:
+        if key is None or not text:
+            return
+        with self._ocr_cache_lock:
+            self._ocr_cache[key] = (time.monotonic() + self.ocr_cache_ttl_secs, text)
+            self._ocr_cache.move_to_end(key)
+            if len(self._ocr_cache) > self.ocr_cache_size:
+                self._ocr_cache.popitem(last=False)
+
     def preprocess_and_ocr(self, roi: np.ndarray) -> str:
-        ocr_result = ""
         if roi is None or roi.size == 0:
             logger.debug("Received empty ROI for OCR.")
             return ""
+        key = self._ocr_cache_key(roi)
+        cached = self._ocr_cache_get(key)
+        if cached is not None:
+            logger.debug(f"OCR cache hit for ROI of shape {roi.shape}: '{cached}'")
+            return cached
+        ocr_result = self._ocr_roi(roi)
+        self._ocr_cache_put(key, ocr_result)
+        return ocr_result
 
+    def _ocr_roi(self, roi: np.ndarray) -> str:
+        ocr_result = ""
+
+        tesseract_future: Optional[Future] = None
         # --- Attempt Gemini OCR first if available and configured ---
         if self.model and self.gemini_api_key:
+            executor = self._tesseract_executor
+            if executor is not None and _get_pytesseract() is not None:
+                try:
+                    tesseract_future = executor.submit(self._tesseract_ocr, roi)
+                except RuntimeError: # close() ran concurrently; Tesseract runs inline below if needed
+                    tesseract_future = None
             logger.debug("Attempting OCR using Gemini...")
             try:
                 ocr_result = self._call_gemini_ocr(roi) # This method is wrapped with @retry
@@ -167,31 +375,39 @@ class LicensePlatePreprocessor:
 
             if ocr_result: # If Gemini found something, return it.
                  logger.info(f"Gemini OCR successful, result: '{ocr_result}'")
+                 if tesseract_future is not None:
+                     tesseract_future.cancel() # Only helps if it has not started yet; a running one is simply ignored
                  return ocr_result
             else: # Gemini failed or found nothing, log and fall through to Tesseract.
                  logger.info("Gemini OCR did not yield a result or failed. Falling back to Tesseract if available.")
 
         # --- Fallback to Tesseract OCR ---
-        # Check if pytesseract module itself was successfully imported
-        if 'pytesseract' not in globals() and 'pytesseract' not in locals():
-            # This check might be tricky depending on how pytesseract is imported (e.g. import pytesseract vs from foo import pytesseract)
-            # A more robust check is to see if the variable 'pytesseract' exists and is not None.
-            # However, the original code checked `if not pytesseract:` which assumes `import pytesseract` was attempted.
+        if tesseract_future is not None:
+            try:
+                return tesseract_future.result() # Already running (or done) since the Gemini call started
+            except CancelledError: # Dropped from the queue by close(); run it inline instead
+                pass
+        if _get_pytesseract() is None:
              if not (self.model and self.gemini_api_key): # Only log this warning if Gemini wasn't tried/configured
                  logger.warning("Pytesseract module not available. No OCR will be performed.")
              return ""
 
+        return self._tesseract_ocr(roi)
+
+    def _tesseract_ocr(self, roi: np.ndarray) -> str:
+        ocr_result = ""
+        pytesseract = _get_pytesseract()
+        if pytesseract is None:
+            return ""
         logger.debug("Attempting OCR using Tesseract...")
         processed_roi_for_tesseract = self._preprocess_for_tesseract(roi)
 
         if processed_roi_for_tesseract is not None:
             try:
-                # Standard Tesseract config for license plates
-                custom_config = r'--oem 3 --psm 7 -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'
                 # Add a timeout to Tesseract call to prevent indefinite blocking
-                text = pytesseract.image_to_string(processed_roi_for_tesseract, config=custom_config, timeout=5)
+                text = pytesseract.image_to_string(processed_roi_for_tesseract, config=self._tess_config, timeout=5)
 
-                ocr_result = ''.join(filter(str.isalnum, text)).upper() # Clean and format
+                ocr_result = _clean_plate_text(text) # Clean and format
                 if ocr_result:
                     logger.info(f"Tesseract OCR Raw: '{text.strip()}', Processed: '{ocr_result}'")
                 else:
@@ -207,3 +423,35 @@ class LicensePlatePreprocessor:
             ocr_result = "" # Ensure it's empty if preprocessing fails
 
         return ocr_result
+
+    async def preprocess_and_ocr_many(self, rois: Sequence[np.ndarray]) -> List[str]:
+        """
+        Async counterpart of preprocess_and_ocr for all plates of a frame: one concurrent Gemini batch, then
+        Tesseract (in worker threads) for the ROIs Gemini could not read. Cached reads are reused as in
+        preprocess_and_ocr. Results are in input order.
+        """
+        results = [""] * len(rois)
+        keys: Dict[int, Optional[Tuple]] = {}
+        valid = []
+        for i, roi in enumerate(rois):
+            if roi is None or roi.size == 0:
+                continue
+            keys[i] = self._ocr_cache_key(roi)
+            cached = self._ocr_cache_get(keys[i])
+            if cached is not None:
+                results[i] = cached
+            else:
+                valid.append(i)
+        if self.model and self.gemini_api_key and valid:
+            logger.debug(f"Attempting OCR of {len(valid)} ROIs using Gemini...")
+            for i, text in zip(valid, await self._call_gemini_ocr_batch([rois[i] for i in valid])):
+                results[i] = text
+
+        fallback = [i for i in valid if not results[i]]
+        if fallback:
+            texts = await asyncio.gather(*(asyncio.to_thread(self._tesseract_ocr, rois[i]) for i in fallback))
+            for i, text in zip(fallback, texts):
+                results[i] = text
+        for i in valid:
+            self._ocr_cache_put(keys[i], results[i])
+        return results
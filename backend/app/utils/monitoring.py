@@ -1,10 +1,53 @@
 import numpy as np
-from typing import Dict, Any
+from itertools import repeat
+from typing import Dict, Any, Optional, Tuple
 
 # It's good practice to have logging available in all modules
 import logging
 logger = logging.getLogger(__name__)
 
+try:
+    from numba import njit
+except ImportError: # Optional accelerator; TrafficMonitor falls back to its NumPy reduction without it
+    njit = None
+
+# Below this many tracks NumPy's per-call overhead outweighs a plain Python pass over the vehicle dicts
+_VECTORIZE_MIN_VEHICLES = 32
+
+
+def _as_id(value: Any) -> int:
+    """class_id / lane as an int; None and other non-integer values (e.g. from a partial track) map to -1 (unknown)."""
+    return int(value) if isinstance(value, (int, np.integer)) else -1
+
+
+def _reduce_frame(speeds, class_ids, stopped_threshold, speed_limit, n_classes):
+    """
+    One pass over the per-frame arrays: (stopped, speeding, speed sum, class counts). class_counts has
+    n_classes + 1 slots; ids outside [0, n_classes) are counted in the last one.
+    """
+    stopped = 0
+    speeding = 0
+    speed_sum = 0.0
+    class_counts = np.zeros(n_classes + 1, dtype=np.int64)
+    for i in range(speeds.shape[0]):
+        speed = speeds[i]
+        speed_sum += speed
+        if speed < stopped_threshold:
+            stopped += 1
+        if speed > speed_limit:
+            speeding += 1
+        class_id = class_ids[i]
+        if 0 <= class_id < n_classes:
+            class_counts[class_id] += 1
+        else:
+            class_counts[n_classes] += 1
+    return stopped, speeding, speed_sum, class_counts
+
+
+# Compiled on first use and cached on disk; None when numba is not installed
+_reduce_frame_jit = njit(cache=True)(_reduce_frame) if njit is not None else None
+
+
 class TrafficMonitor:
     # Class attribute: Mapping of vehicle class IDs to their names.
     # This can be expanded or moved to configuration if it becomes more complex.
@@ -15,6 +58,12 @@ class TrafficMonitor:
         7: 'truck',
         -1: 'unknown' # Explicitly define unknown for clarity
     }
+    # Keys of vehicle_type_counts, built once; 'unknown' is always present since unmapped class_ids land there
+    _TYPE_NAMES: Tuple[str, ...] = tuple(sorted(set(vehicle_type_map.values()) | {'unknown'}))
+    # Type name per class-count slot of _reduce_frame; the extra last slot collects out-of-range ids
+    _CLASS_SLOT_NAMES: Tuple[str, ...] = tuple(
+        map(vehicle_type_map.get, range(max(vehicle_type_map) + 1), repeat('unknown'))
+    ) + ('unknown',)
 
     def __init__(self, config: Dict[str, Any]):
         self.config = config
@@ -31,6 +80,12 @@ class TrafficMonitor:
 
         self.stopped_threshold_kmh: float = config.get('stopped_speed_threshold_kmh', 5.0) # km/h
 
+        # Struct-of-arrays view of tracked_vehicles, rebuilt by update_vehicles so get_metrics can use vectorized ops.
+        # None while the frame is too small to be worth vectorizing.
+        self._speeds: Optional[np.ndarray] = None
+        self._class_ids: Optional[np.ndarray] = None
+        self._lanes: Optional[np.ndarray] = None
+
     def update_vehicles(self, vehicles: Dict[int, Dict[str, Any]]):
         """
         Updates the monitor with the latest set of tracked vehicles.
@@ -39,11 +94,66 @@ class TrafficMonitor:
                       Each vehicle data dictionary should ideally contain 'lane', 'speed', 'class_id'.
         """
         self.tracked_vehicles = vehicles
-        self.lane_counts.clear() # Reset lane counts for the new update
-        for _track_id, data in vehicles.items():
-            lane = data.get('lane', -1) # Default to -1 if lane info is missing
-            if lane != -1: # Only count if lane info is valid
-                self.lane_counts[lane] = self.lane_counts.get(lane, 0) + 1
+        # A new dict per update rather than clearing in place: get_metrics hands this dict out without copying,
+        # so metrics returned for earlier frames must never change underneath their holders
+        count = len(vehicles)
+        if count < _VECTORIZE_MIN_VEHICLES:
+            self._speeds = self._class_ids = self._lanes = None
+            lane_counts: Dict[int, int] = {}
+            for data in vehicles.values():
+                lane = _as_id(data.get('lane')) # -1 if lane info is missing or invalid
+                if lane != -1: # Only count if lane info is valid
+                    lane_counts[lane] = lane_counts.get(lane, 0) + 1
+            self.lane_counts = dict(sorted(lane_counts.items())) # Ascending lane ids, like np.unique on the vectorized path
+            return
+
+        rows = vehicles.values()
+        self._speeds = np.fromiter((data.get('speed', 0.0) for data in rows), dtype=np.float64, count=count) # Default to 0.0 if speed is missing
+        self._class_ids = np.fromiter((_as_id(data.get('class_id')) for data in rows), dtype=np.int64, count=count) # -1 for unknown class_id
+        self._lanes = np.fromiter((_as_id(data.get('lane')) for data in rows), dtype=np.int64, count=count) # -1 if lane info is missing
+
+        lanes, lane_totals = np.unique(self._lanes[self._lanes != -1], return_counts=True) # Only count valid lanes
+        self.lane_counts = dict(zip(lanes.tolist(), lane_totals.tolist()))
+
+    def _reduce_vehicles(self) -> Tuple[int, int, float, Dict[str, int]]:
+        """Single pass over the vehicle dicts: (stopped, speeding, speed sum, type counts). Used for small frames."""
+        stopped_count = speeding_count = 0
+        speed_sum = 0.0
+        stopped_threshold, speed_limit = self.stopped_threshold_kmh, self.speed_limit_kmh
+        type_map = self.vehicle_type_map
+        vehicle_type_counts = dict.fromkeys(self._TYPE_NAMES, 0)
+        for data in self.tracked_vehicles.values():
+            speed_kmh = float(data.get('speed', 0.0)) # Default to 0.0 if speed is missing
+            speed_sum += speed_kmh
+            # bools add as 0/1, so the counters need no branches
+            stopped_count += speed_kmh < stopped_threshold
+            speeding_count += speed_kmh > speed_limit
+            type_name = type_map.get(_as_id(data.get('class_id')), 'unknown') # -1 / unmapped class_id -> 'unknown'
+            vehicle_type_counts[type_name] += 1
+        return stopped_count, speeding_count, speed_sum, vehicle_type_counts
+
+    def _reduce_arrays(self) -> Tuple[int, int, float, Dict[str, int]]:
+        """Vectorized counterpart of _reduce_vehicles over the arrays built by update_vehicles."""
+        speeds = self._speeds
+        stopped_count = int(np.count_nonzero(speeds < self.stopped_threshold_kmh))
+        speeding_count = int(np.count_nonzero(speeds > self.speed_limit_kmh))
+        vehicle_type_counts = dict.fromkeys(self._TYPE_NAMES, 0)
+        class_ids, class_totals = np.unique(self._class_ids, return_counts=True)
+        for class_id, class_total in zip(class_ids.tolist(), class_totals.tolist()):
+            type_name = self.vehicle_type_map.get(class_id, 'unknown') # Get type, default to 'unknown'
+            vehicle_type_counts[type_name] += class_total
+        return stopped_count, speeding_count, float(speeds.sum()), vehicle_type_counts
+
+    def _reduce_arrays_jit(self) -> Tuple[int, int, float, Dict[str, int]]:
+        """_reduce_arrays as a single compiled loop; used when numba is available."""
+        stopped_count, speeding_count, speed_sum, class_counts = _reduce_frame_jit(
+            self._speeds, self._class_ids, self.stopped_threshold_kmh, self.speed_limit_kmh,
+            len(self._CLASS_SLOT_NAMES) - 1
+        )
+        vehicle_type_counts = dict.fromkeys(self._TYPE_NAMES, 0)
+        for type_name, class_total in zip(self._CLASS_SLOT_NAMES, class_counts.tolist()):
+            vehicle_type_counts[type_name] += class_total
+        return int(stopped_count), int(speeding_count), float(speed_sum), vehicle_type_counts
 
     def get_metrics(self) -> Dict[str, Any]:
         """
@@ -51,32 +161,17 @@ class TrafficMonitor:
         Returns:
             A dictionary containing metrics like total vehicles, counts of stopped/speeding vehicles,
             average speed, congestion level, vehicle counts per lane, etc.
+            'vehicles_per_lane' is the monitor's own per-frame dict, not a copy: treat it as read-only.
         """
         total_vehicles = len(self.tracked_vehicles)
-        stopped_count = 0
-        speeding_count = 0
-        speeds_list_kmh: list[float] = []
-
-        # Initialize vehicle type counts, ensuring all defined types in vehicle_type_map are present
-        vehicle_type_counts: Dict[str, int] = {name: 0 for name in self.vehicle_type_map.values()}
-        # Ensure 'unknown' is also initialized if not already in the map's values (though it is by default now)
-        if 'unknown' not in vehicle_type_counts:
-             vehicle_type_counts['unknown'] = 0
-
-        for data in self.tracked_vehicles.values():
-            speed_kmh = float(data.get('speed', 0.0)) # Default to 0.0 if speed is missing
-            speeds_list_kmh.append(speed_kmh)
-
-            if speed_kmh < self.stopped_threshold_kmh:
-                stopped_count += 1
-            if speed_kmh > self.speed_limit_kmh:
-                speeding_count += 1
-
-            class_id = data.get('class_id', -1) # Default to -1 for unknown class_id
-            type_name = self.vehicle_type_map.get(class_id, 'unknown') # Get type, default to 'unknown'
-            vehicle_type_counts[type_name] = vehicle_type_counts.get(type_name, 0) + 1
+        if self._speeds is None:
+            stopped_count, speeding_count, speed_sum, vehicle_type_counts = self._reduce_vehicles()
+        elif _reduce_frame_jit is not None:
+            stopped_count, speeding_count, speed_sum, vehicle_type_counts = self._reduce_arrays_jit()
+        else:
+            stopped_count, speeding_count, speed_sum, vehicle_type_counts = self._reduce_arrays()
 
-        avg_speed_kmh = float(np.mean(speeds_list_kmh)) if speeds_list_kmh else 0.0
+        avg_speed_kmh = speed_sum / total_vehicles if total_vehicles else 0.0
 
         # Congestion level as percentage of stopped vehicles
         congestion_lvl_percent = float((stopped_count / total_vehicles) * 100.0) if total_vehicles > 0 else 0.0
@@ -95,7 +190,7 @@ class TrafficMonitor:
             'average_speed_kmh': round(avg_speed_kmh, 1),
             'congestion_level_percent': round(congestion_lvl_percent, 1),
             'is_congested': is_congested,
-            'vehicles_per_lane': self.lane_counts.copy(), # Return a copy
+            'vehicles_per_lane': self.lane_counts, # Replaced (never mutated) by the next update_vehicles
             'high_density_lanes': high_density_lanes,
             'vehicle_type_counts': vehicle_type_counts
         }
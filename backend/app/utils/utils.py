@@ -1,38 +1,89 @@
 # /content/drive/MyDrive/R1v0.1/backend/app/utils/utils.py
 
-# Imports needed for check_system_resources or the __main__ block
+# Imports needed for check_system_resources
 import logging
+import threading
+import time
+import warnings
 import psutil # For check_system_resources
-from typing import Tuple # For check_system_resources type hint
-
-# Imports strictly for the __main__ example block (if not already covered)
-import sys
-import time # Used in __main__ for alert item formatting (if that part is kept/re-added)
-from pathlib import Path # Used in __main__ for config path
-
-# Third-party imports potentially used in __main__ (if not already covered)
-import cv2 # Used in __main__ for dummy image creation
-import numpy as np # Used in __main__ for dummy image creation & np.zeros
-# Unused imports like asyncio, sqlite3, queue, threading, re, yaml, io, collections.deque,
-# functools.lru_cache, tenacity, torch, PIL.Image, pytesseract, google.generativeai,
-# google.api_core.exceptions, multiprocessing.Queue, other typing hints (Dict, Any, etc.),
-# pymongo, sqlalchemy components, contextlib components will be removed if not used by retained code.
-
-# Logging setup
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+from typing import NamedTuple, Optional, Tuple # For check_system_resources type hints
+
+# Logging is configured by the application entrypoint (app/main.py), not by this library module
 logger = logging.getLogger(__name__)
 
 # ----- System Resources -----
-def check_system_resources(cpu_interval: float = 0.1) -> Tuple[float, float]:
-    """Checks current CPU and Virtual Memory usage percentage."""
-    try:
-        cpu_percent = psutil.cpu_percent(interval=cpu_interval)
-        memory_info = psutil.virtual_memory()
-        memory_percent = memory_info.percent
-        return cpu_percent, memory_percent
-    except Exception as e:
-        logger.error(f"Failed to get system resource usage: {e}", exc_info=True)
-        return 0.0, 0.0
+class Resources(NamedTuple):
+    """CPU and virtual memory usage, in percent. Unpacks like the (cpu, memory) tuple it replaces."""
+    cpu: float
+    memory: float
+
+# Returned when psutil fails to produce a sample
+_NO_RESOURCES = Resources(0.0, 0.0)
+
+# Samples are reused for this many seconds; pollers faster than this share one psutil read.
+RESOURCE_SAMPLE_TTL = 0.25
+_last_sample: Tuple[float, Resources] = (float("-inf"), _NO_RESOURCES) # (monotonic ts, sample)
+_sample_lock = threading.Lock()
+# Full tracebacks for sampling failures are logged at most once per this many seconds
+_ERROR_LOG_INTERVAL = 60.0
+_last_error_log = float("-inf")
+
+# Prime psutil's CPU counters so the first non-blocking cpu_percent() call has a baseline.
+psutil.cpu_percent(interval=None)
+
+# Total memory doesn't change while the process runs, so read it once.
+_MEM_TOTAL = psutil.virtual_memory().total
+_MEMINFO_PATH = "/proc/meminfo"
+
+def _memory_percent() -> float:
+    """
+    Memory usage percentage as computed by psutil.virtual_memory().percent.
+    On Linux only the MemAvailable line of /proc/meminfo is parsed, instead of every field.
+    """
+    if psutil.LINUX:
+        with open(_MEMINFO_PATH, "rb") as meminfo:
+            for line in meminfo:
+                if line.startswith(b"MemAvailable:"):
+                    available = int(line.split()[1]) * 1024 # Reported in kB
+                    return round(100.0 * (_MEM_TOTAL - available) / _MEM_TOTAL, 1)
+    # Non-Linux platforms, or kernels too old to report MemAvailable
+    return psutil.virtual_memory().percent
+
+def check_system_resources(cpu_interval: Optional[float] = None, ttl: float = RESOURCE_SAMPLE_TTL) -> Resources:
+    """
+    Checks current CPU and Virtual Memory usage percentage without blocking.
+    The CPU figure follows psutil's interval=None contract: it is the average usage since the
+    previous sample, so the first call after a long idle period reports that whole window.
+    Results are cached for `ttl` seconds; pass ttl=0 to force a fresh sample.
+    `cpu_interval` is deprecated; passing it restores the old blocking measurement and bypasses the cache
+    (the fresh sample still refreshes it).
+    """
+    if cpu_interval is not None:
+        warnings.warn("check_system_resources(cpu_interval=...) is deprecated and blocks for the whole interval",
+                      DeprecationWarning, stacklevel=2)
+        ttl = 0 # A cached non-blocking sample would silently ignore the requested interval
+    global _last_sample, _last_error_log
+    now = time.monotonic()
+    sample = _last_sample
+    if now - sample[0] < ttl:
+        return sample[1]
+    with _sample_lock:
+        sample = _last_sample
+        if time.monotonic() - sample[0] < ttl: # Another thread refreshed it while we waited
+            return sample[1]
+        try:
+            cpu_percent = psutil.cpu_percent(interval=cpu_interval)
+            memory_percent = _memory_percent()
+        except Exception as e:
+            if now - _last_error_log > _ERROR_LOG_INTERVAL:
+                _last_error_log = now
+                logger.error(f"Failed to get system resource usage: {e}", exc_info=True)
+            else:
+                logger.debug("Failed to get system resource usage: %s", e)
+            return _NO_RESOURCES
+        resources = Resources(cpu_percent, memory_percent)
+        _last_sample = (time.monotonic(), resources)
+        return resources
 
 # --- Custom Exceptions ---
 # DatabaseError moved to backend/app/utils/database.py
@@ -50,88 +101,4 @@ def check_system_resources(cpu_interval: float = 0.1) -> Tuple[float, float]:
 
 # DatabaseManager class moved to backend/app/utils/database.py
 
-
-# --- Example Usage (Optional: for testing utils directly) ---
-if __name__ == "__main__":
-    # Adjusted imports for moved components
-    from backend.app.utils.config import load_config, ConfigError
-    from backend.app.utils.database import DatabaseManager, DatabaseError
-    from backend.app.utils.image_processing import LicensePlatePreprocessor # New import
-
-    print("Running utils.py directly (for testing purposes)...")
-    try:
-        project_root_dir = Path(__file__).resolve().parent.parent.parent
-        # Standard config file name, adjust if your project uses a different one
-        config_file_path_main_try = project_root_dir / "config.yaml"
-        
-        # Fallback for alternative CWDs or slightly different structures
-        # This logic helps if the script is run from various locations.
-        if not config_file_path_main_try.exists():
-            alt_config_paths = [
-                Path("config.yaml"),                            # CWD is project root
-                Path("../../../config.yaml").resolve(),          # CWD is utils (backend/app/utils)
-                Path("../../config.yaml").resolve(),             # CWD is app (backend/app)
-                Path("../config.yaml").resolve(),                # CWD is backend (backend)
-            ]
-            for p in alt_config_paths:
-                if p.exists():
-                    config_file_path_main_try = p
-                    break
-            if not config_file_path_main_try.exists():
-                 print(f"Warning: config.yaml not found in typical locations relative to {Path.cwd()} or script dir.")
-                 # As a last resort, try to create a default one if possible or use embedded defaults.
-                 # For this test script, we'll proceed with empty config if none found after extensive search.
-                 # config_file_path_main_try = None # Or set to a default path where it *should* be
-                 # For now, we let load_config handle the case where the file doesn't exist if path is None/invalid
-
-        print(f"Attempting to load config from: {config_file_path_main_try}")
-        # load_config will use its internal defaults if config_file_path_main_try is None or file not found
-        config_data = load_config(config_file_path_main_try if config_file_path_main_try and config_file_path_main_try.exists() else Path("non_existent_config_to_force_defaults.yaml"))
-
-        print("\n--- Configuration Loaded (using new config module) ---")
-        print(f"Database path from config: {config_data.get('database',{}).get('db_path')}")
-        print(f"Model path from config: {config_data.get('vehicle_detection',{}).get('model_path')}")
-        gemini_key = config_data.get('ocr_engine',{}).get('gemini_api_key')
-        print(f"Gemini Key Set in config: {'Yes' if gemini_key and gemini_key.strip() else 'No'}")
-
-        print("\n--- Testing DatabaseManager (with config from new module) ---")
-        db_manager = DatabaseManager(config_data)
-        # Example: Save an alert and retrieve it.
-        # Note: This is a basic test. More comprehensive tests should be in dedicated test files.
-        # test_alert_success = db_manager.save_alert("INFO", "TestFeedCLI-Utils", "CLI test alert from utils.py.", '{"details": "test from main block"}')
-        # print(f"Save alert success: {test_alert_success}")
-
-        # alerts = asyncio.run(db_manager.get_alerts_filtered({}, limit=3)) # Example for async method
-        # For sync version if preferred for CLI test:
-        # alerts = db_manager._execute_get_alerts_filtered({}, limit=3)
-        # print(f"Retrieved {len(alerts)} recent alerts (example):")
-        # for alert_item in alerts: print(f"  ID:{alert_item['id']} Time:{time.strftime('%H:%M:%S', time.localtime(alert_item['timestamp']))} Sev:{alert_item['severity']}")
-        print("Skipping DB operations in utils.py main block for brevity. Test via dedicated test files.")
-        db_manager.close()
-
-        # LicensePlatePreprocessor is now imported from image_processing.py
-        if gemini_key and gemini_key.strip(): # Check if key is actually present
-            print("\n--- Testing LicensePlatePreprocessor (Gemini - with config from new module) ---")
-            lp_preprocessor = LicensePlatePreprocessor(config_data) # Instantiated from new import
-            dummy_roi = np.zeros((100, 300, 3), dtype=np.uint8)
-            cv2.putText(dummy_roi, "TEST", (50, 70), cv2.FONT_HERSHEY_SIMPLEX, 2, (255,255,255), 3)
-            print("Attempting OCR on a dummy image with Gemini...")
-            ocr_text_gemini = lp_preprocessor.preprocess_and_ocr(dummy_roi)
-            print(f"Gemini Dummy OCR Result: '{ocr_text_gemini}' (Empty is OK if key invalid/quota hit)")
-        else:
-            print("\n--- Skipping Gemini OCR test (API key not configured in loaded config) ---")
-
-        print("--- Testing LicensePlatePreprocessor (Tesseract Fallback - with config from new module) ---")
-        # Ensure config_data is passed even if Gemini key is missing, for other Tesseract settings
-        lp_preprocessor_tess = LicensePlatePreprocessor(config_data) # Instantiated from new import
-        dummy_roi_tess = np.zeros((100, 300, 3), dtype=np.uint8)
-        cv2.rectangle(dummy_roi_tess, (10,10), (290,90), (50,50,50), -1)
-        cv2.putText(dummy_roi_tess, "TST123", (40, 70), cv2.FONT_HERSHEY_SIMPLEX, 2, (220,220,220), 5, cv2.LINE_AA)
-        print("Attempting OCR on a dummy image with Tesseract...")
-        ocr_text_tesseract = lp_preprocessor_tess.preprocess_and_ocr(dummy_roi_tess)
-        print(f"Tesseract Dummy OCR Result: '{ocr_text_tesseract}' (Requires Tesseract installed & configured)")
-
-    except ConfigError as ce: print(f"\n--- CONFIGURATION ERROR ---\n{ce}"); sys.exit(1)
-    except DatabaseError as dbe: print(f"\n--- DATABASE ERROR ---\n{dbe}"); sys.exit(1)
-    except Exception as exc: print(f"\n--- UNEXPECTED ERROR IN MAIN TEST BLOCK ---\n{exc}"); logger.error("Main test block error", exc_info=True); sys.exit(1)
-    print("\n--- Utils.py Tests Finished ---")
\ No newline at end of file
+# The former __main__ smoke tests live in backend/app/tests/utils/test_utils_smoke.py